@@ -0,0 +1,135 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+User = get_user_model()
+
+USER_KEY = 'api:user:{user_id}'
+VERSION_KEY = 'api:token_version:{user_id}'
+VERSION_CLAIM = 'ver'
+# Поля, которых хватает для проверок прав и записи author_id.
+PRINCIPAL_FIELDS = tuple(
+    field.attname for field in User._meta.concrete_fields
+    if field.attname in ('id', 'username', 'role', 'is_staff', 'is_active')
+)
+
+
+def user_key(user_id):
+    return USER_KEY.format(user_id=user_id)
+
+
+def version_key(user_id):
+    return VERSION_KEY.format(user_id=user_id)
+
+
+def principal(values):
+    """Экземпляр User, в котором загружены только PRINCIPAL_FIELDS."""
+    return User.from_db(
+        DEFAULT_DB_ALIAS,
+        PRINCIPAL_FIELDS,
+        [values[field] for field in PRINCIPAL_FIELDS],
+    )
+
+
+class RoleAccessToken(AccessToken):
+    """Токен доступа с username, ролью и версией токенов пользователя."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for field, value in user.token_claims().items():
+            token[field] = value
+        token[VERSION_CLAIM] = user.token_version
+        return token
+
+
+def principal_values(user):
+    return {field: getattr(user, field) for field in PRINCIPAL_FIELDS}
+
+
+def get_token_version(user_id):
+    """Текущая версия токенов пользователя или None, если его нет.
+
+    Прочитанное из базы кладётся в кэш через add: пока шло чтение,
+    сохранение пользователя могло записать туда более новую версию.
+    """
+    key = version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = User.objects.filter(pk=user_id).values_list(
+            'token_version', flat=True
+        ).first()
+        if version is not None:
+            cache.add(key, version, settings.AUTH_USER_CACHE_TIMEOUT)
+    return version
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication, который обходится без чтения пользователя.
+
+    Если в токене есть поля пользователя и его версия совпадает с
+    текущей token_version, пользователь собирается из токена. Иначе
+    поля берутся из кэша, а при промахе — из базы. В обоих случаях
+    получается экземпляр User с отложенными остальными полями; кому
+    нужны все поля, перечитывает пользователя из базы.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+        version = validated_token.get(VERSION_CLAIM)
+        if version is not None and version == get_token_version(user_id):
+            user = principal({
+                field: validated_token.get(field)
+                for field in PRINCIPAL_FIELDS if field != 'id'
+            } | {'id': user_id})
+        else:
+            values = cache.get(user_key(user_id))
+            if values is None:
+                user = super().get_user(validated_token)
+                cache.add(
+                    user_key(user.pk),
+                    principal_values(user),
+                    settings.AUTH_USER_CACHE_TIMEOUT,
+                )
+                return user
+            user = principal(values)
+        if not user.is_active:
+            raise AuthenticationFailed(
+                'Пользователь неактивен.', code='user_inactive'
+            )
+        return user
+
+
+def remember_user(sender, instance, **kwargs):
+    """Записывает в кэш новые поля и версию токенов после COMMIT.
+
+    Значения записываются, а не удаляются: читатель, получивший из базы
+    старые, кладёт их через add и не может затереть новые.
+    """
+    values = principal_values(instance)
+    version = instance.token_version
+
+    def remember():
+        cache.set_many(
+            {user_key(instance.pk): values, version_key(instance.pk): version},
+            settings.AUTH_USER_CACHE_TIMEOUT,
+        )
+
+    transaction.on_commit(remember)
+
+
+def forget_user(sender, instance, **kwargs):
+    keys = [user_key(instance.pk), version_key(instance.pk)]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+post_save.connect(remember_user, sender=User)
+post_delete.connect(forget_user, sender=User)
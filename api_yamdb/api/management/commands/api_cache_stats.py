@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from api.v1.cache import get_stats
+
+CACHED_VIEWS = ('titles', 'genres', 'categories')
+
+
+class Command(BaseCommand):
+    help = "Показывает попадания в кэш ответов API и время ответа."
+
+    def handle(self, *args, **options):
+        for view, stats in get_stats(CACHED_VIEWS).items():
+            hits, misses = stats['hits'], stats['misses']
+            total = hits + misses
+            hit_rate = hits / total if total else 0
+            hit_ms = stats['hit_us'] / hits / 1000 if hits else 0
+            miss_ms = stats['miss_us'] / misses / 1000 if misses else 0
+            self.stdout.write(
+                f'{view}: hits={hits} misses={misses} '
+                f'hit_rate={hit_rate:.1%} '
+                f'hit_avg={hit_ms:.2f}ms miss_avg={miss_ms:.2f}ms'
+            )
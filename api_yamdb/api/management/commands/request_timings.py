@@ -0,0 +1,46 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from api import timing
+
+
+def approximate_percentile(histogram, fraction):
+    """Верхняя граница корзины, в которую попадает перцентиль."""
+    total = sum(histogram.values())
+    if not total:
+        return None
+    seen = 0
+    for bucket, count in histogram.items():
+        seen += count
+        if seen >= fraction * total:
+            return bucket
+    return 'inf'
+
+
+class Command(BaseCommand):
+    help = "Выводит гистограммы времени запросов к API по маршрутам."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Очистить гистограммы после вывода.",
+        )
+
+    def handle(self, *args, **options):
+        result = {}
+        for route, metrics in timing.histograms().items():
+            result[route] = {
+                metric: {
+                    "count": sum(histogram.values()),
+                    "p50_ms": approximate_percentile(histogram, 0.5),
+                    "p95_ms": approximate_percentile(histogram, 0.95),
+                    "p99_ms": approximate_percentile(histogram, 0.99),
+                    "buckets_ms": histogram,
+                }
+                for metric, histogram in metrics.items()
+            }
+        self.stdout.write(json.dumps(result, ensure_ascii=False, indent=2))
+        if options["reset"]:
+            timing.clear()
@@ -0,0 +1,69 @@
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from api import timing
+
+logger = logging.getLogger('api.timing')
+
+
+class RequestTimingMiddleware:
+    """Замеряет запросы к API и отдаёт результат в Server-Timing.
+
+    Включается настройкой REQUEST_TIMING['ENABLED']. Помимо заголовка
+    пишет строку JSON в логгер api.timing и пополняет гистограммы по
+    маршрутам, которые выводит команда request_timings.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_TIMING['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.path_prefix = settings.REQUEST_TIMING['PATH_PREFIX']
+
+    def __call__(self, request):
+        if not request.path.startswith(self.path_prefix):
+            return self.get_response(request)
+        request_timing = timing.RequestTiming()
+        token = timing.activate(request_timing)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(
+                        request_timing.execute_wrapper
+                    ))
+                response = self.get_response(request)
+            request_timing.stop('render')
+        finally:
+            timing.deactivate(token)
+        durations = request_timing.as_dict()
+        durations['total'] = round((time.perf_counter() - started) * 1000, 3)
+        response['Server-Timing'] = ', '.join(
+            f'{name};dur={duration}' for name, duration in durations.items()
+        ) + f', queries;desc="{request_timing.queries}"'
+
+        match = request.resolver_match
+        route = f'{request.method} {match.view_name if match else "-"}'
+        logger.info(json.dumps({
+            'route': route,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': request_timing.queries,
+            **{f'{name}_ms': value for name, value in durations.items()},
+        }))
+        timing.record(route, durations)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timing.start('view')
+
+    def process_template_response(self, request, response):
+        timing.stop('view')
+        timing.start('render')
+        return response
@@ -0,0 +1,139 @@
+import time
+from contextvars import ContextVar
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+
+HISTOGRAM_KEY = 'timing:{route}:{metric}:{bucket}'
+ROUTES_KEY = 'timing:routes'
+METRICS = ('total', 'view', 'db', 'serialize', 'render')
+
+_current = ContextVar('request_timing', default=None)
+
+
+class RequestTiming:
+    """Замеры одного запроса: SQL, сериализация, view и рендеринг."""
+
+    def __init__(self):
+        self.started = {}
+        self.durations = {}
+        self.queries = 0
+        self.db_time = 0.0
+
+    def start(self, name):
+        self.started.setdefault(name, time.perf_counter())
+
+    def stop(self, name):
+        if name in self.started and name not in self.durations:
+            self.durations[name] = time.perf_counter() - self.started[name]
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - started
+
+    def as_dict(self):
+        result = {
+            name: round(duration * 1000, 3)
+            for name, duration in self.durations.items()
+        }
+        result['db'] = round(self.db_time * 1000, 3)
+        return result
+
+
+def current():
+    return _current.get()
+
+
+def activate(timing):
+    return _current.set(timing)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+def start(name):
+    timing = current()
+    if timing is not None:
+        timing.start(name)
+
+
+def stop(name):
+    timing = current()
+    if timing is not None:
+        timing.stop(name)
+
+
+def histogram_key(route, metric, bucket):
+    return HISTOGRAM_KEY.format(
+        route=md5(route.encode()).hexdigest(), metric=metric, bucket=bucket
+    )
+
+
+def get_cache():
+    return caches[settings.REQUEST_TIMING['CACHE_ALIAS']]
+
+
+def bucket_names():
+    return [*map(str, settings.REQUEST_TIMING['BUCKETS_MS']), 'inf']
+
+
+def bucket_for(duration_ms):
+    for bound in settings.REQUEST_TIMING['BUCKETS_MS']:
+        if duration_ms <= bound:
+            return str(bound)
+    return 'inf'
+
+
+def incr(cache, key):
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def record(route, durations):
+    """Добавляет замеры запроса в гистограммы маршрута."""
+    cache = get_cache()
+    routes = cache.get(ROUTES_KEY, set())
+    if route not in routes:
+        cache.set(ROUTES_KEY, routes | {route}, None)
+    for metric, duration_ms in durations.items():
+        incr(cache, histogram_key(route, metric, bucket_for(duration_ms)))
+
+
+def histograms():
+    """Гистограммы всех маршрутов: {маршрут: {метрика: {корзина: n}}}."""
+    cache = get_cache()
+    buckets = bucket_names()
+    result = {}
+    for route in sorted(cache.get(ROUTES_KEY, set())):
+        keys = {
+            histogram_key(route, metric, bucket): (metric, bucket)
+            for metric in METRICS
+            for bucket in buckets
+        }
+        route_histograms = {}
+        for key, value in cache.get_many(keys).items():
+            metric, bucket = keys[key]
+            route_histograms.setdefault(metric, dict.fromkeys(buckets, 0))
+            route_histograms[metric][bucket] = value
+        result[route] = route_histograms
+    return result
+
+
+def clear():
+    cache = get_cache()
+    for route in cache.get(ROUTES_KEY, set()):
+        cache.delete_many([
+            histogram_key(route, metric, bucket)
+            for metric in METRICS
+            for bucket in bucket_names()
+        ])
+    cache.delete(ROUTES_KEY)
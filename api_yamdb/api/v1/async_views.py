@@ -0,0 +1,96 @@
+"""Асинхронный путь чтения для запуска под ASGI.
+
+В Django 3.2 у ORM нет асинхронных методов, а DRF 3.12 не поддерживает
+асинхронные view. Поэтому в обход вьюсета обслуживается только то, что не
+требует базы: 304 по ETag и ответы из кэша. Если кэш не в памяти
+процесса, он читается в пуле потоков, чтобы не блокировать event loop.
+Остальные запросы целиком
+выполняет исходный вьюсет — за один переход в поток вместо того, чтобы
+занимать поток на всё время обработки под ASGI.
+"""
+from asgiref.sync import sync_to_async
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.urls import URLPattern
+
+from api.v1.mixins import CachedListMixin
+
+READ_ACTIONS = ('list', 'retrieve')
+JSON_MEDIA_TYPES = ('*/*', 'application/*', 'application/json')
+
+
+def accepts_json(request, kwargs):
+    if 'format' in request.GET or 'format' in kwargs:
+        return False
+    # Браузеры первым просят text/html — им DRF отдаёт Browsable API.
+    accept = request.headers.get('Accept', '*/*')
+    return accept.split(',')[0].split(';')[0].strip() in JSON_MEDIA_TYPES
+
+
+def can_skip_view(request, kwargs):
+    # С токеном ответ зависит от результата аутентификации, поэтому
+    # такие запросы проходят через DRF.
+    return (
+        request.method in ('GET', 'HEAD')
+        and 'HTTP_AUTHORIZATION' not in request.META
+        and accepts_json(request, kwargs)
+    )
+
+
+def cache_blocks():
+    """Обращение к кэшу блокирует поток: чтение с диска или по сети.
+
+    Только LocMemCache держит данные в памяти процесса.
+    """
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache)
+
+
+async def response_without_view(viewset, request):
+    if cache_blocks():
+        # База не нужна, поэтому не в общем потоке синхронных view.
+        return await sync_to_async(
+            viewset.response_without_view, thread_sensitive=False
+        )(request)
+    return viewset.response_without_view(request)
+
+
+def async_read_view(view):
+    """Асинхронная обёртка над view вьюсета с кэшем ответов."""
+    sync_view = sync_to_async(view)
+
+    async def async_view(request, *args, **kwargs):
+        if can_skip_view(request, kwargs):
+            viewset = view.cls(**view.initkwargs)
+            viewset.args, viewset.kwargs = args, kwargs
+            response = await response_without_view(viewset, request)
+            if response is not None:
+                return response
+        return await sync_view(request, *args, **kwargs)
+
+    async_view.cls = view.cls
+    async_view.initkwargs = view.initkwargs
+    async_view.actions = view.actions
+    async_view.csrf_exempt = True
+    return async_view
+
+
+def is_cached_read(pattern):
+    view = pattern.callback
+    return (
+        isinstance(pattern, URLPattern)
+        and issubclass(getattr(view, 'cls', object), CachedListMixin)
+        and getattr(view, 'actions', {}).get('get') in READ_ACTIONS
+    )
+
+
+def async_read_urls(urlpatterns):
+    """Подменяет list/retrieve кэшируемых вьюсетов асинхронными view."""
+    return [
+        URLPattern(
+            pattern.pattern,
+            async_read_view(pattern.callback),
+            pattern.default_args,
+            pattern.name,
+        ) if is_cached_read(pattern) else pattern
+        for pattern in urlpatterns
+    ]
@@ -0,0 +1,227 @@
+import threading
+import time
+import uuid
+from collections import Counter
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, TitleRanking, User)
+from reviews.signals import data_changed
+
+VERSION_KEY = 'api:version:{namespace}'
+RESPONSE_KEY = 'api:response:{namespace}:{digest}'
+STATS_KEY = 'api:stats:{view}:{counter}'
+STATS_COUNTERS = ('hits', 'misses', 'hit_us', 'miss_us')
+# Версия всех ответов сразу: её меняют записи в обход сигналов моделей,
+# после которых неизвестно, какие пространства имён устарели.
+GLOBAL_NAMESPACE = 'all'
+
+# Какие кэши устаревают при изменении модели.
+INVALIDATES = {
+    Genre: ('genres', 'titles'),
+    Category: ('categories', 'titles'),
+    Title: ('titles',),
+    GenreTitle: ('titles',),
+    Review: ('titles',),
+}
+# То же для записей в обход сигналов; TitleRanking показывают
+# /titles/top/ и /titles/trending/.
+BULK_INVALIDATES = {**INVALIDATES, TitleRanking: ('titles',)}
+
+
+def new_version():
+    return uuid.uuid4().hex
+
+
+def get_versions(*namespaces):
+    """Текущие версии данных пространств имён, одним чтением кэша.
+
+    Версия — случайная строка, поэтому версия, вытесненная из кэша, не
+    совпадёт ни с одной из выданных ранее.
+    """
+    keys = [
+        VERSION_KEY.format(namespace=namespace) for namespace in namespaces
+    ]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            cache.add(key, new_version(), None)
+        versions.update(cache.get_many(missing))
+    return [versions[key] for key in keys]
+
+
+def get_version(namespace):
+    return get_versions(namespace)[0]
+
+
+def bump_version(*namespaces):
+    """Меняет версии пространств имён после фиксации транзакции.
+
+    До COMMIT другой процесс прочитал бы старые строки и сохранил их под
+    новой версией. Новая версия записывается целиком, а не через incr:
+    у многих бэкендов incr — это get и set, и два одновременных сброса
+    могли бы слиться в один.
+    """
+    keys = [
+        VERSION_KEY.format(namespace=namespace) for namespace in namespaces
+    ]
+
+    def bump():
+        cache.set_many({key: new_version() for key in keys}, None)
+
+    transaction.on_commit(bump)
+
+
+def request_digest(namespace, request, variant=''):
+    """Отпечаток запроса и текущих версий данных.
+
+    Порядок параметров в строке запроса не влияет на результат. Схема и
+    хост входят в отпечаток: ссылки next/previous в ответе абсолютные, и
+    ответ на запрос с чужим Host не должен доставаться остальным.
+    variant различает ответы, которые меняются без записи данных.
+    Подходит и для HttpRequest Django, и для Request DRF.
+    """
+    query = sorted(request.GET.lists())
+    versions = ':'.join(get_versions(GLOBAL_NAMESPACE, namespace))
+    origin = request.build_absolute_uri('/')
+    return md5(
+        f'{namespace}:{versions}:{variant}:{origin}{request.path}?{query}'
+        .encode()
+    ).hexdigest()
+
+
+def response_key(namespace, digest):
+    return RESPONSE_KEY.format(namespace=namespace, digest=digest)
+
+
+class PendingStats:
+    """Счётчики статистики, накопленные процессом с последней выгрузки.
+
+    Запись в кэш на каждый ответ стоила бы дороже самого попадания,
+    поэтому счётчики складываются в кэш не чаще раза в
+    API_CACHE_STATS_FLUSH_INTERVAL секунд.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self.lock = threading.Lock()
+        self.flushed_at = time.monotonic()
+
+    def add(self, key, delta):
+        with self.lock:
+            self.counts[key] += delta
+            now = time.monotonic()
+            if now - self.flushed_at < settings.API_CACHE_STATS_FLUSH_INTERVAL:
+                return
+            counts, self.counts = self.counts, Counter()
+            self.flushed_at = now
+        for key, delta in counts.items():
+            if not cache.add(key, delta, None):
+                try:
+                    cache.incr(key, delta)
+                except ValueError:
+                    cache.set(key, delta, None)
+
+    def get(self, key):
+        with self.lock:
+            return self.counts[key]
+
+    def clear(self):
+        with self.lock:
+            self.counts.clear()
+
+
+pending_stats = PendingStats()
+
+
+def incr_stat(view, counter, delta=1):
+    pending_stats.add(STATS_KEY.format(view=view, counter=counter), delta)
+
+
+def get_stats(views):
+    """Счётчики из кэша вместе с ещё не выгруженными счётчиками процесса."""
+    keys = {
+        STATS_KEY.format(view=view, counter=counter): (view, counter)
+        for view in views
+        for counter in STATS_COUNTERS
+    }
+    stats = {view: dict.fromkeys(STATS_COUNTERS, 0) for view in views}
+    stored = cache.get_many(keys)
+    for key, (view, counter) in keys.items():
+        stats[view][counter] = stored.get(key, 0) + pending_stats.get(key)
+    return stats
+
+
+def invalidate_on_change(sender, **kwargs):
+    bump_version(*INVALIDATES[sender])
+
+
+for model in INVALIDATES:
+    post_save.connect(invalidate_on_change, sender=model)
+    post_delete.connect(invalidate_on_change, sender=model)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_title_reviews(sender, instance, **kwargs):
+    bump_version(f'reviews:{instance.title_id}')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_review_comments(sender, instance, **kwargs):
+    bump_version(f'comments:{instance.review_id}')
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_on_genres_change(sender, action, **kwargs):
+    if action.startswith('post_'):
+        bump_version(*INVALIDATES[GenreTitle])
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_names(sender, instance, created, raw=False, **kwargs):
+    """Отзывы и комментарии показывают username автора.
+
+    post_save приходит до того, как User.save запомнит новые поля, поэтому
+    в _loaded_claims ещё прежнее имя.
+    """
+    loaded = getattr(instance, '_loaded_claims', {})
+    if created or raw or loaded.get('username', instance.username) == (
+        instance.username
+    ):
+        return
+    title_ids = Review.objects.filter(author=instance).values_list(
+        'title_id', flat=True
+    ).distinct()
+    review_ids = Comment.objects.filter(author=instance).values_list(
+        'review_id', flat=True
+    ).distinct()
+    bump_version(
+        *(f'reviews:{title_id}' for title_id in title_ids),
+        *(f'comments:{review_id}' for review_id in review_ids),
+    )
+
+
+@receiver(data_changed)
+def invalidate_on_bulk_change(sender, models, **kwargs):
+    """Сбрасывает кэш после записи в обход сигналов моделей.
+
+    Отзывы и комментарии кэшируются по родителю, поэтому их изменение
+    сбрасывает все ответы сразу.
+    """
+    if {Review, Comment, User} & set(models):
+        bump_version(GLOBAL_NAMESPACE)
+    else:
+        bump_version(*{
+            namespace
+            for model in models
+            for namespace in BULK_INVALIDATES.get(model, ())
+        })
@@ -1,9 +1,160 @@
-from rest_framework import mixins, viewsets
+import time
 
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import mixins, status, viewsets
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from api import timing
+from api.v1 import cache as api_cache
 from api.v1.permissions import IsAdminOrReadOnly
 
 
+class SerializerTimingMixin:
+    """Отмечает для Server-Timing время от создания сериализатора до ответа.
+
+    Сюда входят валидация, сохранение и построение представления.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        timing.start('serialize')
+        return super().get_serializer(*args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        timing.stop('serialize')
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class CachedListMixin:
+    """Кэширует ответы list до изменения данных.
+
+    Ключ содержит версию пространства имён, которую сигналы моделей
+    увеличивают при записи, поэтому старые ответы просто не читаются.
+    Из той же версии считается ETag: на If-None-Match с совпадающим
+    значением возвращается 304 без обращения к базе.
+    """
+
+    cache_namespace = None
+    cache_responses = True
+
+    def get_cache_namespace(self):
+        return self.cache_namespace
+
+    def get_cache_variant(self):
+        """Часть ключа для ответов, которые меняются без записи данных."""
+        return ''
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        started = time.perf_counter()
+        digest = api_cache.request_digest(
+            self.get_cache_namespace(), request, self.get_cache_variant()
+        )
+        etag = quote_etag(digest)
+        if self.etag_matches(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            response['ETag'] = etag
+            return response
+        if not self.cache_responses:
+            response = handler(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                response['ETag'] = etag
+            return response
+        key = api_cache.response_key(self.cache_namespace, digest)
+        data = cache.get(key)
+        if data is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                cache.set(key, response.data, settings.API_CACHE_TIMEOUT)
+                response['ETag'] = etag
+            outcome, counter = 'MISS', 'misses'
+        else:
+            response = Response(data)
+            response['ETag'] = etag
+            outcome, counter = 'HIT', 'hits'
+        response['X-Cache'] = outcome
+        self.record_outcome(outcome, counter, started)
+        return response
+
+    @staticmethod
+    def etag_matches(request, etag):
+        return etag in parse_etags(request.headers.get('If-None-Match', ''))
+
+    def record_outcome(self, outcome, counter, started):
+        elapsed = int((time.perf_counter() - started) * 1_000_000)
+        api_cache.incr_stat(self.cache_namespace, counter)
+        api_cache.incr_stat(
+            self.cache_namespace, f'{outcome.lower()}_us', elapsed
+        )
+
+    def response_without_view(self, request):
+        """Ответ, для которого не нужна база, или None.
+
+        Это 304 на совпавший If-None-Match или данные из кэша ответов;
+        ответ уже отрендерен в JSON, без участия DRF.
+        """
+        started = time.perf_counter()
+        digest = api_cache.request_digest(
+            self.get_cache_namespace(), request, self.get_cache_variant()
+        )
+        etag = quote_etag(digest)
+        if self.etag_matches(request, etag):
+            response = HttpResponseNotModified()
+        elif not self.cache_responses:
+            return None
+        else:
+            data = cache.get(api_cache.response_key(
+                self.cache_namespace, digest
+            ))
+            if data is None:
+                return None
+            response = HttpResponse(
+                JSONRenderer().render(data), content_type='application/json'
+            )
+            response['X-Cache'] = 'HIT'
+            self.record_outcome('HIT', 'hits', started)
+        response['ETag'] = etag
+        patch_vary_headers(response, ('Accept',))
+        return response
+
+
+class CachedListRetrieveMixin(CachedListMixin):
+    """Кэширует ответы list и retrieve."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class NestedListMixin:
+    """Список объектов, вложенных в родителя из URL.
+
+    get_queryset фильтрует по id родителя из URL, не запрашивая самого
+    родителя. Существование родителя проверяется, только если страница
+    пуста: иначе для несуществующего родителя вернулся бы пустой список
+    вместо 404.
+    """
+
+    def parent_exists(self):
+        raise NotImplementedError
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if not page and not self.parent_exists():
+            raise Http404
+        return page
+
+
 class GenreCategoryMixin(
+    SerializerTimingMixin,
+    CachedListMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.DestroyModelMixin,
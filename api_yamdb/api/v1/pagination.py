@@ -0,0 +1,113 @@
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from datetime import date
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class OptionalCursorPagination(LimitOffsetPagination):
+    """Limit/offset по умолчанию, keyset-пагинация при наличии ?cursor=.
+
+    В режиме курсора страница выбирается условием по (pub_date, id),
+    а не OFFSET, и общее количество объектов не считается.
+    """
+
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор.'
+    ordering = ('-pub_date', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_cursor = self.cursor_query_param in request.query_params
+        if not self.use_cursor:
+            return super().paginate_queryset(queryset, request, view)
+        self.request = request
+        self.limit = self.get_limit(request) or self.default_limit
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(
+            request.query_params[self.cursor_query_param]
+        )
+        if position is not None:
+            pub_date, pk = position
+            queryset = queryset.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+            )
+        page = list(queryset[:self.limit + 1])
+        self.has_next = len(page) > self.limit
+        page = page[:self.limit]
+        self.last = page[-1] if page else None
+        return page
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_next_link(self):
+        if not self.use_cursor:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.offset_query_param
+        )
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.last)
+        )
+
+    @staticmethod
+    def encode_cursor(obj):
+        position = f'{obj.pub_date.isoformat()}:{obj.pk}'
+        return b64encode(position.encode()).decode()
+
+    def decode_cursor(self, encoded):
+        if not encoded:
+            return None
+        try:
+            pub_date, pk = b64decode(encoded.encode()).decode().split(':')
+            return date.fromisoformat(pub_date), int(pk)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class NoCountPagination(LimitOffsetPagination):
+    """Limit/offset без подсчёта общего количества объектов.
+
+    COUNT(*) по всей таблице стоил бы больше самой страницы; о следующей
+    странице говорит лишний объект, выбранный сверх limit.
+    """
+
+    max_limit = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request) or self.default_limit
+        self.offset = self.get_offset(request)
+        page = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(page) > self.limit
+        return page[:self.limit]
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = replace_query_param(
+            self.request.build_absolute_uri(),
+            self.limit_query_param,
+            self.limit,
+        )
+        return replace_query_param(
+            url, self.offset_query_param, self.offset + self.limit
+        )
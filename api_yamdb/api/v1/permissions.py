@@ -42,6 +42,6 @@ class AuthorModerAdmin(permissions.BasePermission):
             return (
                 request.user.is_admin
                 or request.user.is_moderator
-                or (request.user == obj.author)
+                or request.user.pk == obj.author_id
             )
         return True
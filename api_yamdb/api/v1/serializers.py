@@ -1,9 +1,14 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 from rest_framework.relations import SlugRelatedField
 from rest_framework.serializers import ModelSerializer
 
 
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.models import (SCORE_COUNT_FIELDS, Category, Comment, Genre,
+                            Review, Title, TitleRanking, User,
+                            refresh_rankings)
+from reviews.search import KINDS, MODELS, get_backend
 
 
 class UsersSerializer(ModelSerializer):
@@ -38,11 +43,12 @@ class CategorySerializer(ModelSerializer):
 class TitleSerializer(ModelSerializer):
     class Meta:
         model = Title
-        fields = "__all__"
+        exclude = ("rating_sum", "rating_count", *SCORE_COUNT_FIELDS)
 
 
 class TitleGetSerializer(TitleSerializer):
     rating = serializers.IntegerField(read_only=True, default=None)
+    reviews_count = serializers.IntegerField(source="rating_count")
     category = CategorySerializer()
     genre = GenreSerializer(many=True)
 
@@ -72,6 +78,34 @@ class TitleWriteSerializer(TitleSerializer):
         return serializer.data
 
 
+class TitleStatsSerializer(ModelSerializer):
+    count = serializers.IntegerField(source="rating_count")
+    mean = serializers.FloatField(source="rating")
+    median = serializers.FloatField(source="score_median")
+    histogram = serializers.DictField(
+        source="score_histogram", child=serializers.IntegerField()
+    )
+
+    class Meta:
+        model = Title
+        fields = ("id", "count", "mean", "median", "histogram")
+
+
+class TitleRankingSerializer(ModelSerializer):
+    """Поля произведения из TitleGetSerializer и его место в рейтинге."""
+
+    trend = serializers.FloatField(source="current_trend")
+
+    class Meta:
+        model = TitleRanking
+        fields = ("weighted_rating", "trend")
+
+    def to_representation(self, instance):
+        data = TitleGetSerializer(instance.title, context=self.context).data
+        data.update(super().to_representation(instance))
+        return data
+
+
 class GetTokenSerializer(ModelSerializer):
     username = serializers.CharField(
         required=True)
@@ -116,10 +150,213 @@ class ReviewSerializer(ModelSerializer):
     def create(self, validated_data):
         request = self.context.get('request')
         author = request.user
-        title = validated_data.get('title')
-        if Review.objects.filter(author=author, title=title).exists():
+        validated_data['author'] = author
+        # Единственность отзыва обеспечивает ограничение unique_review, а
+        # не проверка перед вставкой, которую одновременные запросы могли
+        # пройти оба. Review.save выполняется в atomic, то есть в точке
+        # сохранения, если транзакция уже открыта, и после ошибки
+        # транзакцией можно пользоваться дальше.
+        try:
+            return super().create(validated_data)
+        except IntegrityError:
+            if not Review.objects.filter(
+                author=author, title=validated_data.get('title')
+            ).exists():
+                raise
             raise serializers.ValidationError(
                 'Разрешен один отзыв от пользователя'
             )
-        validated_data['author'] = author
-        return super().create(validated_data)
+
+
+class SearchQuerySerializer(serializers.Serializer):
+    search = serializers.CharField()
+    type = serializers.CharField(default=','.join(MODELS))
+    limit = serializers.IntegerField(
+        default=10, min_value=1, max_value=settings.SEARCH_MAX_RESULTS
+    )
+
+    def validate_type(self, value):
+        kinds = [kind for kind in value.split(',') if kind]
+        unknown = set(kinds) - set(MODELS)
+        if unknown or not kinds:
+            raise serializers.ValidationError(
+                f'Допустимые типы: {", ".join(MODELS)}'
+            )
+        return kinds
+
+
+class SearchResultSerializer(serializers.Serializer):
+    type = serializers.CharField()
+    id = serializers.IntegerField()
+    rank = serializers.FloatField()
+    title_id = serializers.IntegerField()
+    review_id = serializers.IntegerField(allow_null=True)
+    text = serializers.CharField()
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """Список объектов, каждый из которых проверяется отдельно.
+
+    Ошибка в одном элементе не мешает сохранить остальные: ошибки
+    собираются в item_errors по индексам элементов.
+    """
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            raise serializers.ValidationError('Ожидается список объектов.')
+        if not data:
+            raise serializers.ValidationError('Список пуст.')
+        if len(data) > settings.API_BULK_MAX_ITEMS:
+            raise serializers.ValidationError(
+                'Слишком много объектов, наибольшее количество: '
+                f'{settings.API_BULK_MAX_ITEMS}.'
+            )
+        self.item_errors = [None] * len(data)
+        result = []
+        for index, item in enumerate(data):
+            try:
+                result.append(self.child.run_validation(item))
+            except serializers.ValidationError as exc:
+                self.item_errors[index] = exc.detail
+                result.append(None)
+        return result
+
+    def valid_items(self):
+        return [
+            (index, data) for index, data in enumerate(self.validated_data)
+            if data is not None
+        ]
+
+    def reject(self, index, errors):
+        self.item_errors[index] = errors
+        self.validated_data[index] = None
+
+    def resolve_authors(self):
+        """Подставляет id авторов; чужого автора задаёт только админ."""
+        user = self.context['request'].user
+        usernames = {
+            data['author'] for _, data in self.valid_items()
+            if 'author' in data
+        }
+        authors = dict(User.objects.filter(
+            username__in=usernames
+        ).values_list('username', 'pk')) if user.is_admin else {}
+        for index, data in self.valid_items():
+            username = data.pop('author', None)
+            if username is None:
+                data['author_id'] = user.pk
+            elif not user.is_admin:
+                self.reject(index, {'author': [
+                    'Указывать автора может только администратор.'
+                ]})
+            elif username not in authors:
+                self.reject(index, {'author': ['Пользователь не найден.']})
+            else:
+                data['author_id'] = authors[username]
+
+    def resolve(self):
+        """Проверки, которым нужна база: по запросу на весь список."""
+        self.resolve_authors()
+        self.check_existing()
+
+    def check_existing(self):
+        """Отклоняет элементы, которые противоречат данным в базе."""
+
+    def save(self, **kwargs):
+        # Вставка и работа сигналов в одной транзакции: если пересчёт
+        # упадёт, объекты не останутся без рейтинга и поискового индекса.
+        with transaction.atomic():
+            self.resolve()
+            model = self.child.Meta.model
+            while True:
+                items = self.valid_items()
+                try:
+                    objs = model.objects.bulk_create_with_pks(
+                        [model(**data) for _, data in items]
+                    )
+                    break
+                except IntegrityError:
+                    # После проверок другой запрос успел занять ключ или
+                    # удалить связанный объект: такие элементы
+                    # отклоняются, остальные записываются заново.
+                    self.check_existing()
+                    if len(self.valid_items()) == len(items):
+                        raise
+            self.instance = dict(zip((index for index, _ in items), objs))
+            self.after_create(objs)
+        return self.instance
+
+    def after_create(self, objs):
+        """bulk_create не отправляет сигналы: их работа делается здесь."""
+        get_backend().index_many(KINDS[self.child.Meta.model], objs)
+
+    def results(self):
+        """Результат по каждому элементу списка в исходном порядке."""
+        return [
+            {'index': index, 'status': 400, 'errors': errors}
+            if errors else
+            {'index': index, 'status': 201, 'id': self.instance[index].pk}
+            for index, errors in enumerate(self.item_errors)
+        ]
+
+
+class ReviewBulkListSerializer(BulkListSerializer):
+
+    def check_existing(self):
+        items = self.valid_items()
+        title_ids = {data['title_id'] for _, data in items}
+        titles = set(Title.objects.filter(
+            pk__in=title_ids
+        ).values_list('pk', flat=True))
+        taken = set(Review.objects.filter(
+            title_id__in=title_ids,
+            author_id__in={data['author_id'] for _, data in items},
+        ).values_list('title_id', 'author_id'))
+        for index, data in items:
+            key = (data['title_id'], data['author_id'])
+            if data['title_id'] not in titles:
+                self.reject(index, {'title': ['Произведение не найдено.']})
+            elif key in taken:
+                self.reject(index, {'non_field_errors': [
+                    'Разрешен один отзыв от пользователя'
+                ]})
+            else:
+                taken.add(key)
+
+    def after_create(self, objs):
+        super().after_create(objs)
+        title_ids = {review.title_id for review in objs}
+        Title.objects.filter(pk__in=title_ids).recompute_ratings()
+        refresh_rankings(title_ids)
+
+
+class CommentBulkListSerializer(BulkListSerializer):
+
+    def check_existing(self):
+        items = self.valid_items()
+        reviews = set(Review.objects.filter(
+            pk__in={data['review_id'] for _, data in items}
+        ).values_list('pk', flat=True))
+        for index, data in items:
+            if data['review_id'] not in reviews:
+                self.reject(index, {'review': ['Отзыв не найден.']})
+
+
+class ReviewBulkSerializer(ReviewSerializer):
+    title = serializers.IntegerField(source='title_id', min_value=1)
+    author = serializers.CharField(required=False)
+
+    class Meta:
+        model = Review
+        fields = ('title', 'author', 'text', 'score')
+        list_serializer_class = ReviewBulkListSerializer
+
+
+class CommentBulkSerializer(CommentSerializer):
+    review = serializers.IntegerField(source='review_id', min_value=1)
+    author = serializers.CharField(required=False)
+
+    class Meta:
+        model = Comment
+        fields = ('review', 'author', 'text')
+        list_serializer_class = CommentBulkListSerializer
@@ -1,8 +1,11 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from api.v1 import views
-from api.v1.views import (APIGetToken, APISignup, UsersViewSet)
+from api.v1.async_views import async_read_urls
+from api.v1.views import (APIExport, APIGetToken, APISearch, APISignup,
+                          UsersViewSet)
 
 
 app_name = 'api'
@@ -41,8 +44,24 @@ v1_router.register(
 )
 
 
+router_urls = v1_router.urls
+if settings.API_ASYNC_READS:
+    router_urls = async_read_urls(router_urls)
+
 urlpatterns = [
-    path('', include(v1_router.urls)),
+    path('', include(router_urls)),
     path('auth/token/', APIGetToken.as_view(), name='get_token'),
     path('auth/signup/', APISignup.as_view(), name='signup'),
+    path('search/', APISearch.as_view(), name='search'),
+    path('export/<str:dataset>/', APIExport.as_view(), name='export'),
+    path(
+        'reviews/bulk/',
+        views.ReviewBulkCreateView.as_view(),
+        name='reviews-bulk'
+    ),
+    path(
+        'comments/bulk/',
+        views.CommentBulkCreateView.as_view(),
+        name='comments-bulk'
+    ),
 ]
@@ -1,20 +1,30 @@
-from django.core.mail import EmailMessage
-from django.db.models import Avg
+import time
+
+from django.conf import settings
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import mixins, status, viewsets
+from rest_framework import generics, mixins, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.filters import SearchFilter
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import AllowAny
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
 
+from api.authentication import RoleAccessToken
+from api.v1 import cache as api_cache
 from api.v1 import permissions
 from api.v1 import serializers
-from api.v1.filters import TitleFilter
-from api.v1.mixins import GenreCategoryMixin
+from api.v1.filters import (TitleFilter, TitleOrderingFilter,
+                            filter_by_genres)
+from api.v1.mixins import (CachedListRetrieveMixin, GenreCategoryMixin,
+                           NestedListMixin, SerializerTimingMixin)
+from api.v1.pagination import NoCountPagination, OptionalCursorPagination
+from api.v1.parsers import NDJSONParser
 from api.v1.permissions import AdminOnly
 from api.v1.serializers import (GetTokenSerializer,
                                 NotAdminSerializer,
@@ -23,7 +33,11 @@ from api.v1.serializers import (GetTokenSerializer,
                                 UsersSerializer,
                                 )
 
-from reviews.models import Category, Genre, Review, Title, User
+from reviews import export
+from reviews.mail import enqueue_email
+from reviews.models import (Category, Comment, Genre, Review, Title,
+                            TitleRanking, User)
+from reviews.search import get_backend, load_hits
 
 
 EMAIL_BODY_TEMPLATE = (
@@ -33,6 +47,7 @@ EMAIL_BODY_TEMPLATE = (
 
 
 class UsersViewSet(
+    SerializerTimingMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
@@ -70,19 +85,23 @@ class UsersViewSet(
         permission_classes=(IsAuthenticated,),
         url_path='me')
     def get_current_user_info(self, request):
+        user = request.user
+        if user.get_deferred_fields():
+            # Из кэша аутентификации приходят не все поля пользователя.
+            user = User.objects.get(pk=user.pk)
         serializer_cls = (
-            UsersSerializer if request.user.is_admin else NotAdminSerializer
+            UsersSerializer if user.is_admin else NotAdminSerializer
         )
         if request.method == 'PATCH':
             serializer = serializer_cls(
-                request.user,
+                user,
                 data=request.data,
                 partial=True
             )
             serializer.is_valid(raise_exception=True)
             serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
-        serializer = serializer_cls(request.user)
+        serializer = serializer_cls(user)
         return Response(serializer.data)
 
 
@@ -107,7 +126,7 @@ class APIGetToken(APIView):
                 {'username': 'Пользователь не найден!'},
                 status=status.HTTP_404_NOT_FOUND)
         if data.get('confirmation_code') == user.confirmation_code:
-            token = RefreshToken.for_user(user).access_token
+            token = RoleAccessToken.for_user(user)
             return Response({'token': str(token)},
                             status=status.HTTP_201_CREATED)
         return Response(
@@ -130,12 +149,11 @@ class APISignup(APIView):
 
     @staticmethod
     def send_email(data):
-        email = EmailMessage(
+        enqueue_email(
             subject=data['email_subject'],
             body=data['email_body'],
             to=[data['to_email']]
         )
-        email.send()
 
     def post(self, request):
         if request.data.get("username") and User.objects.filter(
@@ -180,26 +198,165 @@ class APISignup(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class APISearch(APIView):
+    """Полнотекстовый поиск по произведениям, отзывам и комментариям.
+    Права доступа: Доступно без токена. Результаты упорядочены по
+    релевантности. Параметры запроса:
+    search — строка поиска;
+    type — типы объектов через запятую: title, review, comment;
+    limit — количество результатов.
+    """
+
+    permission_classes = (AllowAny,)
+
+    @staticmethod
+    def get(request):
+        serializer = serializers.SearchQuerySerializer(
+            data=request.query_params
+        )
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        hits = get_backend().search(
+            params['search'], params['type'], params['limit']
+        )
+        results = serializers.SearchResultSerializer(
+            load_hits(hits), many=True
+        )
+        return Response({'results': results.data})
+
+
+class APIExport(APIView):
+    """Потоковая выгрузка таблицы целиком.
+    Права доступа: Администратор.
+    GET /api/v1/export/{titles|genre_title|reviews|comments}/?output=ndjson
+    output=csv отдаёт файл в формате static/data.
+    """
+
+    permission_classes = (permissions.IsAdmin,)
+
+    @staticmethod
+    def get(request, dataset):
+        if dataset not in export.DATASETS:
+            raise NotFound(f'Неизвестная таблица {dataset}.')
+        output = request.query_params.get('output', export.NDJSON)
+        if output not in export.OUTPUTS:
+            raise ValidationError({'output': [
+                f'Допустимые значения: {", ".join(export.OUTPUTS)}.'
+            ]})
+        response = StreamingHttpResponse(
+            export.export(dataset, output),
+            content_type=export.CONTENT_TYPES[output],
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{export.filename(dataset, output)}"'
+        )
+        return response
+
+
+def genres_prefetch(lookup='genre'):
+    return Prefetch(
+        lookup, queryset=Genre.objects.only('name', 'slug').order_by('name')
+    )
+
+
+# Порядок строк TitleRanking для действий TitleViewSet; совпадает с
+# индексами модели.
+RANKING_ORDERING = {
+    'top': ('-weighted_rating', 'title_id'),
+    'trending': ('-trend', 'title_id'),
+}
+
+
+class TitleViewSet(
+    SerializerTimingMixin, CachedListRetrieveMixin, viewsets.ModelViewSet
+):
     """Получить список всех объектов. Права доступа: Доступно без токена."""
-    queryset = Title.objects.select_related(
-        'category'
-    ).all().annotate(rating=Avg('reviews__score'))
+    cache_namespace = 'titles'
+    queryset = Title.objects.select_related('category').prefetch_related(
+        genres_prefetch()
+    )
     permission_classes = (permissions.IsAdminOrReadOnly,)
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, TitleOrderingFilter)
     filterset_class = TitleFilter
     http_method_names = ['get', 'post', 'head', 'delete', 'patch']
 
+    def get_queryset(self):
+        if self.action == 'stats':
+            return Title.objects.all()
+        if self.action in RANKING_ORDERING:
+            return TitleRanking.objects.select_related(
+                'title__category'
+            ).prefetch_related(
+                genres_prefetch('title__genre')
+            ).order_by(*RANKING_ORDERING[self.action])
+        return super().get_queryset()
+
+    def get_cache_variant(self):
+        if getattr(self, 'action', None) == 'trending':
+            # trend затухает со временем, и ответ устаревает без записей.
+            return str(
+                int(time.time() // settings.RANKING_TREND_CACHE_TIMEOUT)
+            )
+        return ''
+
     def get_serializer_class(self):
+        if self.action == 'stats':
+            return serializers.TitleStatsSerializer
+        if self.action in RANKING_ORDERING:
+            return serializers.TitleRankingSerializer
         if self.request.method == "GET":
             return serializers.TitleGetSerializer
         return serializers.TitleWriteSerializer
 
+    @action(methods=['GET'], detail=True, url_path='stats')
+    def stats(self, request, *args, **kwargs):
+        """Количество, среднее, медиана и распределение оценок."""
+        return self.cached_response(
+            self.get_stats, request, *args, **kwargs
+        )
+
+    def get_stats(self, request, *args, **kwargs):
+        serializer = self.get_serializer(self.get_object())
+        return Response(serializer.data)
+
+    @action(methods=['GET'], detail=False, url_path='top',
+            pagination_class=NoCountPagination)
+    def top(self, request, *args, **kwargs):
+        """Произведения по убыванию взвешенного рейтинга.
+        Фильтры: ?genre=, ?category=.
+        """
+        return self.cached_response(
+            self.get_rankings, request, *args, **kwargs
+        )
+
+    @action(methods=['GET'], detail=False, url_path='trending',
+            pagination_class=NoCountPagination)
+    def trending(self, request, *args, **kwargs):
+        """Произведения по убыванию недавней активности отзывов.
+        Фильтры: ?genre=, ?category=.
+        """
+        return self.cached_response(
+            self.get_rankings, request, *args, **kwargs
+        )
+
+    def get_rankings(self, request, *args, **kwargs):
+        rankings = self.get_queryset()
+        genre = request.query_params.get('genre')
+        if genre:
+            rankings = filter_by_genres(rankings, [genre])
+        category = request.query_params.get('category')
+        if category:
+            rankings = rankings.filter(category__slug__upper_exact=category)
+        page = self.paginate_queryset(rankings)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
 
 class GenreViewSet(GenreCategoryMixin):
     """Получить список всех жанров. Права доступа: Доступно без токена."""
     queryset = Genre.objects.all()
     serializer_class = serializers.GenreSerializer
+    cache_namespace = 'genres'
     filter_backends = (SearchFilter,)
 
 
@@ -207,20 +364,38 @@ class CategoriesViewSet(GenreCategoryMixin):
     """Получить список всех категорий. Права доступа: Доступно без токена."""
     queryset = Category.objects.all()
     serializer_class = serializers.CategorySerializer
+    cache_namespace = 'categories'
     filter_backends = (SearchFilter,)
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(
+    SerializerTimingMixin, NestedListMixin, CachedListRetrieveMixin,
+    viewsets.ModelViewSet
+):
     """Получить список всех отзывов. Права доступа: Доступно без токена."""
+    cache_namespace = 'reviews'
+    cache_responses = False
     serializer_class = ReviewSerializer
     permission_classes = (permissions.AuthorModerAdmin,)
+    pagination_class = OptionalCursorPagination
     http_method_names = ['get', 'post', 'head', 'delete', 'patch']
 
+    def get_cache_namespace(self):
+        return f'reviews:{self.kwargs.get("title_id")}'
+
     def get_object_title(self):
         return get_object_or_404(Title, pk=self.kwargs.get('title_id'))
 
+    def parent_exists(self):
+        return Title.objects.filter(pk=self.kwargs.get('title_id')).exists()
+
     def get_queryset(self):
-        return self.get_object_title().reviews.all()
+        # Автор нужен только ради username: он берётся тем же запросом.
+        return Review.objects.filter(
+            title_id=self.kwargs.get('title_id')
+        ).select_related('author').only(
+            'text', 'score', 'pub_date', 'title', 'author__username'
+        )
 
     def perform_create(self, serializer):
         serializer.save(
@@ -229,13 +404,21 @@ class ReviewViewSet(viewsets.ModelViewSet):
         )
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(
+    SerializerTimingMixin, NestedListMixin, CachedListRetrieveMixin,
+    viewsets.ModelViewSet
+):
     """Получить комментарий. Права доступа: Доступно без токена."""
-
+    cache_namespace = 'comments'
+    cache_responses = False
     serializer_class = serializers.CommentSerializer
     permission_classes = (permissions.AuthorModerAdmin,)
+    pagination_class = OptionalCursorPagination
     http_method_names = ['get', 'post', 'head', 'delete', 'patch']
 
+    def get_cache_namespace(self):
+        return f'comments:{self.kwargs.get("review_id")}'
+
     def get_object_review(self):
         return get_object_or_404(
             Review,
@@ -243,9 +426,78 @@ class CommentViewSet(viewsets.ModelViewSet):
             title=self.kwargs.get('title_id')
         )
 
+    def parent_exists(self):
+        return Review.objects.filter(
+            pk=self.kwargs.get('review_id'),
+            title=self.kwargs.get('title_id')
+        ).exists()
+
     def get_queryset(self):
-        return self.get_object_review().comments.all()
+        return Comment.objects.filter(
+            review_id=self.kwargs.get('review_id'),
+            review__title_id=self.kwargs.get('title_id'),
+        ).select_related('author').only(
+            'text', 'pub_date', 'review', 'author__username'
+        )
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user,
                         review=self.get_object_review())
+
+
+class BulkCreateView(SerializerTimingMixin, generics.GenericAPIView):
+    """Создание многих объектов одним запросом.
+    Права доступа: Аутентифицированные пользователи; указывать автора
+    может только администратор. Тело запроса — JSON-массив или NDJSON
+    (application/x-ndjson). Ответ содержит результат по каждому элементу:
+    {"index": 0, "status": 201, "id": 1} или
+    {"index": 1, "status": 400, "errors": {...}}.
+    """
+
+    permission_classes = (IsAuthenticated,)
+    parser_classes = (JSONParser, NDJSONParser)
+
+    def get_cache_namespaces(self, objs):
+        raise NotImplementedError
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        created = serializer.save()
+        if created:
+            api_cache.bump_version(
+                *self.get_cache_namespaces(created.values())
+            )
+        results = serializer.results()
+        return Response({
+            'created': len(created),
+            'failed': len(results) - len(created),
+            'results': results,
+        })
+
+
+class ReviewBulkCreateView(BulkCreateView):
+    """Создание отзывов одним запросом. Пример элемента:
+    {"title": 1, "text": "string", "score": 1}
+    """
+
+    serializer_class = serializers.ReviewBulkSerializer
+
+    def get_cache_namespaces(self, objs):
+        title_ids = {review.title_id for review in objs}
+        return (
+            *api_cache.INVALIDATES[Review],
+            *(f'reviews:{title_id}' for title_id in title_ids),
+        )
+
+
+class CommentBulkCreateView(BulkCreateView):
+    """Создание комментариев одним запросом. Пример элемента:
+    {"review": 1, "text": "string"}
+    """
+
+    serializer_class = serializers.CommentBulkSerializer
+
+    def get_cache_namespaces(self, objs):
+        review_ids = {comment.review_id for comment in objs}
+        return (f'comments:{review_id}' for review_id in review_ids)
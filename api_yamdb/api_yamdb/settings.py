@@ -37,6 +37,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.RequestTimingMiddleware',
 ]
 
 ROOT_URLCONF = 'api_yamdb.urls'
@@ -63,13 +64,135 @@ WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
 # Database
 
+# По умолчанию SQLite в db.sqlite3. Для PostgreSQL:
+# DB_ENGINE=django.db.backends.postgresql, DB_NAME, POSTGRES_USER,
+# POSTGRES_PASSWORD, DB_HOST, DB_PORT.
+DB_ENGINE = os.getenv('DB_ENGINE', 'django.db.backends.sqlite3')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': str(BASE_DIR / 'db.sqlite3'),
+        'ENGINE': DB_ENGINE,
+        'NAME': os.getenv('DB_NAME', str(BASE_DIR / 'db.sqlite3')),
+        'USER': os.getenv('POSTGRES_USER', ''),
+        'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+        'HOST': os.getenv('DB_HOST', ''),
+        'PORT': os.getenv('DB_PORT', ''),
+        # Сколько секунд держать соединение открытым между запросами;
+        # 0 — закрывать после каждого запроса.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '0')),
+        # Проверять постоянное соединение в начале запроса и закрывать,
+        # если база его оборвала (reviews.db.close_unusable_connections).
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', '') == '1',
     }
 }
 
+# PRAGMA для каждого нового соединения с SQLite (reviews.db.configure_sqlite).
+# В режиме WAL читатели не ждут пишущую транзакцию, а писатели — читателей;
+# synchronous=normal в WAL не грозит повреждением базы, при сбое ОС
+# теряются только последние транзакции. busy_timeout — сколько
+# миллисекунд ждать блокировку, прежде чем вернуть «database is locked».
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    # Отрицательное значение — размер в КиБ, а не в страницах.
+    'cache_size': -20000,
+    'mmap_size': 128 * 1024 * 1024,
+}
+
+# Соединения через PgBouncer в режиме pool_mode=transaction: серверные
+# курсоры не переживают конец транзакции, поэтому они отключаются, а
+# соединение с PgBouncer можно держать постоянным.
+if os.getenv('DB_PGBOUNCER', '') == '1':
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+
+
+# Cache
+
+# По умолчанию кэш в памяти процесса. FileBasedCache при каждой записи
+# перебирает все файлы каталога, и попадание в кэш обходится дороже
+# запроса к базе. Версии данных в LocMemCache видны только своему
+# процессу, поэтому при нескольких воркерах нужен общий кэш, например
+# Memcached (см. README).
+CACHE_BACKEND = os.getenv(
+    'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+)
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv('CACHE_LOCATION', 'yamdb'),
+    }
+}
+if CACHE_BACKEND == 'django.core.cache.backends.locmem.LocMemCache':
+    # В кэше лежат ответы API, версии и пользователи: стандартных 300
+    # записей мало. LocMemCache вытесняет старые записи, не перебирая
+    # весь кэш.
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 100_000)),
+    }
+
+# Время жизни закэшированных ответов API, секунд.
+API_CACHE_TIMEOUT = 300
+
+# Как часто процесс складывает счётчики попаданий в кэш, секунд.
+API_CACHE_STATS_FLUSH_INTERVAL = 10
+
+# Асинхронные list/retrieve для кэшируемых вьюсетов (api/v1/async_views.py).
+# Включать только под ASGI: под WSGI каждый такой запрос оборачивается
+# в отдельный event loop.
+API_ASYNC_READS = os.getenv('API_ASYNC_READS', '') == '1'
+
+# Наибольшее количество объектов в одном запросе к /reviews/bulk/ и
+# /comments/bulk/.
+API_BULK_MAX_ITEMS = 5000
+
+# Полнотекстовый поиск (?search= и /api/v1/search/).
+SEARCH_BACKEND = os.getenv(
+    'SEARCH_BACKEND',
+    'reviews.search.PostgresSearchBackend'
+    if DB_ENGINE == 'django.db.backends.postgresql'
+    else 'reviews.search.SQLiteFTS5Backend'
+)
+
+# Взвешенный рейтинг /api/v1/titles/top/: к оценкам произведения
+# добавляется столько условных оценок, равных средней по каталогу.
+# Среднюю заново считает только полный пересчёт refresh_rankings.
+RANKING_MIN_REVIEWS = 10
+
+# Период полураспада активности для /api/v1/titles/trending/, дней.
+RANKING_TREND_HALF_LIFE_DAYS = 7
+
+# Сколько секунд ответ /api/v1/titles/trending/ и его ETag действительны:
+# активность затухает и без новых отзывов.
+RANKING_TREND_CACHE_TIMEOUT = 10 * 60
+
+# Наибольшее количество результатов /api/v1/search/.
+SEARCH_MAX_RESULTS = 50
+
+
+# Замеры запросов к API: заголовок Server-Timing, лог api.timing и
+# гистограммы по маршрутам (manage.py request_timings).
+REQUEST_TIMING = {
+    'ENABLED': os.getenv('REQUEST_TIMING', '') == '1',
+    'PATH_PREFIX': '/api/v1/',
+    'CACHE_ALIAS': 'default',
+    'BUCKETS_MS': (5, 10, 25, 50, 100, 250, 500, 1000, 2500),
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
 
 # Password validation
 
@@ -110,7 +233,7 @@ STATICFILES_DIRS = ((BASE_DIR / 'static/'),)
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -125,6 +248,10 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Сколько секунд CachedJWTAuthentication хранит пользователя в кэше.
+# Запись удаляется раньше при любом сохранении или удалении пользователя.
+AUTH_USER_CACHE_TIMEOUT = 300
+
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
 EMAIL_HOST = 'smtp.gmail.com'
@@ -139,4 +266,17 @@ EMAIL_USE_TLS = True
 
 EMAIL_USE_SSL = False
 
+# Письма из запросов складываются в очередь и отправляются командой
+# send_queued_emails. reviews.mail.ImmediateQueue отправляет их сразу.
+EMAIL_QUEUE_BACKEND = os.getenv(
+    'EMAIL_QUEUE_BACKEND', 'reviews.mail.OutboxQueue'
+)
+
+EMAIL_QUEUE_BATCH_SIZE = 100
+
+EMAIL_QUEUE_MAX_ATTEMPTS = 5
+
+# Задержка перед первой повторной попыткой, секунд; далее удваивается.
+EMAIL_QUEUE_RETRY_DELAY = 60
+
 AUTH_USER_MODEL = 'reviews.User'
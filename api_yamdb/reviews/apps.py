@@ -1,7 +1,20 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class ReviewsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "reviews"
     verbose_name = "Ревью"
+
+    def ready(self):
+        from reviews import lookups  # noqa: F401
+        from reviews import db, search
+
+        search.connect_signals()
+        request_started.connect(db.close_unusable_connections)
+        connection_created.connect(db.configure_sqlite)
+        post_migrate.connect(search.setup_index, sender=self)
+        post_migrate.connect(db.create_postgres_indexes, sender=self)
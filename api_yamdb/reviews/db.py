@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Индексы, которые нельзя описать в Meta одинаково для обеих баз: SQLite
+# не принимает NULLS FIRST в CREATE INDEX, а его обычный индекс и так
+# хранит NULL первыми.
+POSTGRES_INDEXES = (
+    'CREATE INDEX IF NOT EXISTS title_rating_nulls_first_idx '
+    'ON reviews_title (rating NULLS FIRST, id)',
+)
+
+
+def close_unusable_connections(**kwargs):
+    """Закрывает постоянные соединения, которые оборвала база.
+
+    Django 3.2 проверяет соединение только после ошибки в запросе,
+    поэтому первый запрос после перезапуска базы или PgBouncer падал бы.
+    Проверка выполняется для баз с CONN_HEALTH_CHECKS в начале запроса,
+    и новое соединение откроется при первом обращении к базе.
+    """
+    for connection in connections.all():
+        if (
+            connection.connection is not None
+            and connection.settings_dict.get('CONN_HEALTH_CHECKS')
+            and not connection.in_atomic_block
+            and not connection.is_usable()
+        ):
+            connection.close()
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Применяет settings.SQLITE_PRAGMAS к новому соединению с SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+    for pragma, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute(f'PRAGMA {pragma} = {value}')
+
+
+def create_postgres_indexes(using=DEFAULT_DB_ALIAS, **kwargs):
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for sql in POSTGRES_INDEXES:
+            cursor.execute(sql)
@@ -0,0 +1,17 @@
+from django.db.models import CharField, Lookup
+
+
+@CharField.register_lookup
+class UpperExact(Lookup):
+    """Регистронезависимое сравнение через UPPER() с обеих сторон.
+
+    В отличие от iexact, который в SQLite превращается в LIKE, может
+    использовать функциональный индекс по Upper(поле).
+    """
+
+    lookup_name = 'upper_exact'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'UPPER({lhs}) = UPPER({rhs})', (*lhs_params, *rhs_params)
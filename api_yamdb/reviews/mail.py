@@ -0,0 +1,109 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import OutgoingEmail
+
+
+class ImmediateQueue:
+    """Отправляет письмо сразу, в рамках запроса."""
+
+    def enqueue(self, message):
+        message.send()
+
+
+class OutboxQueue:
+    """Складывает письма в таблицу, отправляет их send_queued_emails."""
+
+    def enqueue(self, message):
+        OutgoingEmail.objects.bulk_create(
+            OutgoingEmail(
+                subject=message.subject,
+                body=message.body,
+                from_email=message.from_email,
+                to_email=recipient,
+            )
+            for recipient in message.to
+        )
+
+
+def get_queue():
+    return import_string(settings.EMAIL_QUEUE_BACKEND)()
+
+
+def enqueue_email(subject, body, to):
+    get_queue().enqueue(EmailMessage(subject=subject, body=body, to=to))
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка перед повторной отправкой."""
+    return timedelta(
+        seconds=settings.EMAIL_QUEUE_RETRY_DELAY * 2 ** (attempts - 1)
+    )
+
+
+def to_message(email, mail_connection):
+    return EmailMessage(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email or None,
+        to=[email.to_email],
+        connection=mail_connection,
+    )
+
+
+def mark_failed(email, error, now):
+    email.attempts += 1
+    email.last_error = repr(error)
+    email.next_attempt_at = now + retry_delay(email.attempts)
+
+
+def send_queued_emails(batch_size=None, max_attempts=None):
+    """Отправляет пачку писем через одно SMTP-соединение.
+
+    Возвращает количество отправленных и неотправленных писем.
+    """
+    batch_size = batch_size or settings.EMAIL_QUEUE_BATCH_SIZE
+    max_attempts = max_attempts or settings.EMAIL_QUEUE_MAX_ATTEMPTS
+    now = timezone.now()
+    sent = failed = 0
+    with transaction.atomic():
+        queued = OutgoingEmail.objects.filter(
+            sent_at__isnull=True,
+            next_attempt_at__lte=now,
+            attempts__lt=max_attempts,
+        )
+        if connection.features.has_select_for_update_skip_locked:
+            queued = queued.select_for_update(skip_locked=True)
+        emails = list(queued[:batch_size])
+        if not emails:
+            return sent, failed
+        mail_connection = get_connection()
+        try:
+            mail_connection.open()
+        except Exception as error:
+            for email in emails:
+                mark_failed(email, error, now)
+            failed = len(emails)
+        else:
+            for email in emails:
+                try:
+                    to_message(email, mail_connection).send()
+                except Exception as error:
+                    mark_failed(email, error, now)
+                    failed += 1
+                else:
+                    email.attempts += 1
+                    email.sent_at = timezone.now()
+                    email.last_error = ''
+                    sent += 1
+            mail_connection.close()
+        OutgoingEmail.objects.bulk_update(
+            emails,
+            ('attempts', 'next_attempt_at', 'sent_at', 'last_error'),
+        )
+    return sent, failed
@@ -0,0 +1,60 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.export import (CHUNK_SIZE, DATASETS, NDJSON, OUTPUTS, export,
+                            filename)
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгружает произведения, отзывы и комментарии в NDJSON или в csv "
+        "формата static/data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "datasets",
+            nargs="*",
+            help=f"Что выгружать: {', '.join(DATASETS)}; по умолчанию всё.",
+        )
+        parser.add_argument(
+            "--output",
+            default=NDJSON,
+            choices=OUTPUTS,
+            help="Формат выгрузки.",
+        )
+        parser.add_argument(
+            "--path",
+            type=Path,
+            help="Каталог для файлов; без него выгрузка идёт в stdout.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            default=CHUNK_SIZE,
+            type=int,
+            help="Количество строк, читаемых из базы за один раз.",
+        )
+
+    def handle(self, *args, **options):
+        names = options["datasets"] or list(DATASETS)
+        output = options["output"]
+        path = options["path"]
+        unknown = set(names) - set(DATASETS)
+        if unknown:
+            raise CommandError(f"Неизвестные таблицы: {', '.join(unknown)}.")
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size должен быть больше нуля.")
+        if path is not None:
+            path.mkdir(parents=True, exist_ok=True)
+        for name in names:
+            lines = export(name, output, options["chunk_size"])
+            if path is None:
+                for line in lines:
+                    self.stdout.write(line, ending="")
+                continue
+            target = filename(name, output)
+            with open(path / target, "w", encoding="utf-8",
+                      newline="") as file:
+                file.writelines(lines)
+            self.stdout.write(self.style.SUCCESS(f"Записан {target}"))
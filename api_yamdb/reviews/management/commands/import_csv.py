@@ -0,0 +1,250 @@
+import csv
+from contextlib import contextmanager
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import dateparse
+
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, TitleRanking, User, refresh_rankings)
+from reviews.search import get_backend
+from reviews.signals import data_changed
+
+DEFAULT_DATA_DIR = Path(settings.BASE_DIR) / "static" / "data"
+
+
+def parse_date(value):
+    """Дата из полной метки времени или из даты без времени."""
+    moment = dateparse.parse_datetime(value)
+    if moment is not None:
+        return moment.date()
+    return dateparse.parse_date(value)
+
+
+class UnknownReference(Exception):
+    """Строка ссылается на id, которого нет в базе."""
+
+
+def existing_id(ids, model, value):
+    """id из файла, если такая строка model уже есть."""
+    pk = int(value)
+    if pk not in ids[model]:
+        raise UnknownReference(model, pk)
+    return pk
+
+
+def build_user(row, ids):
+    return User(
+        id=row["id"],
+        username=row["username"],
+        email=row["email"],
+        role=row["role"],
+        bio=row["bio"],
+        first_name=row["first_name"],
+        last_name=row["last_name"],
+        password=make_password(None),
+    )
+
+
+def build_title(row, ids):
+    category = int(row["category"]) if row["category"] else None
+    return Title(
+        id=row["id"],
+        name=row["name"],
+        year=row["year"],
+        category_id=category if category in ids[Category] else None,
+    )
+
+
+def build_genre_title(row, ids):
+    return GenreTitle(
+        id=row["id"],
+        title_id=existing_id(ids, Title, row["title_id"]),
+        genre_id=existing_id(ids, Genre, row["genre_id"]),
+    )
+
+
+def build_review(row, ids):
+    return Review(
+        id=row["id"],
+        title_id=existing_id(ids, Title, row["title_id"]),
+        author_id=existing_id(ids, User, row["author"]),
+        text=row["text"],
+        score=row["score"],
+        pub_date=parse_date(row["pub_date"]),
+    )
+
+
+def build_comment(row, ids):
+    return Comment(
+        id=row["id"],
+        review_id=existing_id(ids, Review, row["review_id"]),
+        author_id=existing_id(ids, User, row["author"]),
+        text=row["text"],
+        pub_date=parse_date(row["pub_date"]),
+    )
+
+
+# Порядок важен: файл загружается после всех моделей, на которые ссылается.
+# Последний элемент — столбцы, которые должны быть в заголовке файла.
+CSV_FILES = (
+    ("category.csv", Category, lambda row, ids: Category(**row),
+     ("id", "name", "slug")),
+    ("genre.csv", Genre, lambda row, ids: Genre(**row),
+     ("id", "name", "slug")),
+    ("users.csv", User, build_user,
+     ("id", "username", "email", "role", "bio", "first_name", "last_name")),
+    ("titles.csv", Title, build_title, ("id", "name", "year", "category")),
+    ("genre_title.csv", GenreTitle, build_genre_title,
+     ("id", "title_id", "genre_id")),
+    ("review.csv", Review, build_review,
+     ("id", "title_id", "text", "author", "score", "pub_date")),
+    ("comments.csv", Comment, build_comment,
+     ("id", "review_id", "text", "author", "pub_date")),
+)
+# id запоминаются только для моделей, на которые ссылаются другие файлы.
+REFERENCED_MODELS = {
+    field.related_model
+    for _, model, _, _ in CSV_FILES
+    for field in model._meta.concrete_fields
+    if field.many_to_one
+}
+
+
+@contextmanager
+def keep_auto_now(model):
+    """Не даёт auto_now_add затереть даты, пришедшие из файла."""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, "auto_now_add", False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def read_rows(path):
+    with open(path, encoding="utf-8", newline="") as csv_file:
+        yield from csv.DictReader(csv_file)
+
+
+def missing_columns(path, columns):
+    with open(path, encoding="utf-8", newline="") as csv_file:
+        header = csv.DictReader(csv_file).fieldnames or ()
+    return [column for column in columns if column not in header]
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = "Загружает данные из csv-файлов в формате static/data."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            default=DEFAULT_DATA_DIR,
+            type=Path,
+            help="Каталог с csv-файлами.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            default=1000,
+            type=int,
+            help="Количество строк в одном INSERT.",
+        )
+        parser.add_argument(
+            "--skip-existing",
+            action="store_true",
+            help="Пропускать строки с уже занятыми id.",
+        )
+
+    def handle(self, *args, **options):
+        data_dir = options["path"]
+        if not data_dir.is_dir():
+            raise CommandError(f"Каталог {data_dir} не найден.")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size должен быть больше нуля.")
+        # Заголовки проверяются до загрузки, чтобы не записать часть файлов.
+        for filename, _, _, columns in CSV_FILES:
+            path = data_dir / filename
+            missing = path.exists() and missing_columns(path, columns)
+            if missing:
+                raise CommandError(
+                    f"В {filename} нет столбцов: {', '.join(missing)}."
+                )
+        ids = {}
+        loaded_models = []
+        for filename, model, build, _ in CSV_FILES:
+            path = data_dir / filename
+            if not path.exists():
+                self.stdout.write(self.style.WARNING(f"Пропущен {filename}"))
+            else:
+                created, skipped = self.load_file(
+                    path, model, build, ids, options
+                )
+                loaded_models.append(model)
+                self.stdout.write(self.style.SUCCESS(
+                    f"{filename}: записано {created}, пропущено {skipped}"
+                ))
+            if model in REFERENCED_MODELS:
+                ids[model] = set(
+                    model.objects.values_list("pk", flat=True).iterator()
+                )
+        self.reset_sequences(loaded_models)
+        if Review in loaded_models:
+            Title.objects.recompute_ratings()
+            refresh_rankings()
+            loaded_models += [Title, TitleRanking]
+        # bulk_create не отправляет сигналы, поэтому индекс строится заново
+        # и кэш ответов API сбрасывается.
+        if {Title, Review, Comment} & set(loaded_models):
+            get_backend().rebuild()
+        data_changed.send(sender=self.__class__, models=loaded_models)
+
+    def load_file(self, path, model, build, ids, options):
+        built = skipped = 0
+
+        def build_objects():
+            nonlocal skipped
+            for row in read_rows(path):
+                try:
+                    yield build(row, ids)
+                except UnknownReference:
+                    skipped += 1
+
+        with transaction.atomic(), keep_auto_now(model):
+            # С ignore_conflicts bulk_create не сообщает, сколько строк
+            # вставлено, поэтому записанное считается по размеру таблицы.
+            existed = (
+                model.objects.count() if options["skip_existing"] else 0
+            )
+            for batch in batched(build_objects(), options["batch_size"]):
+                model.objects.bulk_create(
+                    batch, ignore_conflicts=options["skip_existing"]
+                )
+                built += len(batch)
+            created = (
+                model.objects.count() - existed if options["skip_existing"]
+                else built
+            )
+        return created, skipped + built - created
+
+    @staticmethod
+    def reset_sequences(models):
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
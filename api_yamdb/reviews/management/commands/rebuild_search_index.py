@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.search import get_backend
+
+
+class Command(BaseCommand):
+    help = "Перестраивает полнотекстовый индекс по текущим данным."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            get_backend().rebuild()
+        self.stdout.write(self.style.SUCCESS("Поисковый индекс перестроен"))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.models import Title
+from reviews.signals import data_changed
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает сохранённый рейтинг произведений по отзывам."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "title_ids",
+            nargs="*",
+            type=int,
+            help="id произведений; по умолчанию пересчитываются все.",
+        )
+
+    def handle(self, *args, **options):
+        titles = Title.objects.all()
+        if options["title_ids"]:
+            titles = titles.filter(pk__in=options["title_ids"])
+        with transaction.atomic():
+            updated = titles.recompute_ratings()
+        data_changed.send(sender=self.__class__, models=[Title])
+        self.stdout.write(
+            self.style.SUCCESS(f"Пересчитан рейтинг произведений: {updated}")
+        )
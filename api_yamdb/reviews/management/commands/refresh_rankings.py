@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from reviews.models import TitleRanking, refresh_rankings
+from reviews.signals import data_changed
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает взвешенный рейтинг и активность произведений "
+        "для /titles/top/ и /titles/trending/."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "title_ids",
+            nargs="*",
+            type=int,
+            help=(
+                "id произведений; по умолчанию таблица перестраивается "
+                "целиком и заново считается средняя оценка каталога."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        updated = refresh_rankings(options["title_ids"] or None)
+        data_changed.send(sender=self.__class__, models=[TitleRanking])
+        self.stdout.write(
+            self.style.SUCCESS(f"Обновлён рейтинг произведений: {updated}")
+        )
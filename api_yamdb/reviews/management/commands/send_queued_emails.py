@@ -0,0 +1,49 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from reviews.mail import send_queued_emails
+
+
+class Command(BaseCommand):
+    help = "Отправляет письма из очереди исходящих."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            default=settings.EMAIL_QUEUE_BATCH_SIZE,
+            type=int,
+            help="Количество писем за одно SMTP-соединение.",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            default=settings.EMAIL_QUEUE_MAX_ATTEMPTS,
+            type=int,
+            help="После стольких неудачных попыток письмо не отправляется.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Не завершаться, а проверять очередь каждые --interval с.",
+        )
+        parser.add_argument(
+            "--interval",
+            default=5.0,
+            type=float,
+            help="Пауза между проверками очереди в режиме --loop.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = send_queued_emails(
+                options["batch_size"], options["max_attempts"]
+            )
+            if sent or failed:
+                self.stdout.write(
+                    f"Отправлено писем: {sent}, с ошибкой: {failed}"
+                )
+            if not options["loop"]:
+                break
+            if sent + failed < options["batch_size"]:
+                time.sleep(options["interval"])
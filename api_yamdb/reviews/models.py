@@ -1,19 +1,48 @@
+import math
+from collections import defaultdict
+from datetime import date
+
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
-from django.contrib.auth.tokens import default_token_generator
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
-from django.db.models import UniqueConstraint
-from django.db.models.signals import post_save
+from django.db import NotSupportedError, connections, models, transaction
+from django.db.models import (Case, Count, ExpressionWrapper, F, FloatField,
+                              OuterRef, Q, Subquery, Sum, UniqueConstraint,
+                              Value, When)
+from django.db.models.functions import Cast, Coalesce, Exp, Ln, Upper
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.utils import timezone
+from django.utils.crypto import get_random_string
 
 from .validators import validate_username
 
 
+CONFIRMATION_CODE_LENGTH = 32
+
+SCORES = range(1, 11)
+
+
+def score_count_field(score):
+    return f"score_{score}_count"
+
+
+SCORE_COUNT_FIELDS = tuple(score_count_field(score) for score in SCORES)
+# Поля Title, которые ведут только записи отзывов.
+RATING_FIELDS = ("rating_sum", "rating_count", "rating", *SCORE_COUNT_FIELDS)
+
+# Начало отсчёта для показателей экспоненты в TitleRanking.trend.
+RANKING_EPOCH = date(2000, 1, 1)
+
+
 def get_current_year():
     return timezone.now().year
 
 
+def generate_confirmation_code():
+    return get_random_string(CONFIRMATION_CODE_LENGTH)
+
+
 USER = 'user'
 ADMIN = 'admin'
 MODERATOR = 'moderator'
@@ -65,9 +94,18 @@ class User(AbstractUser):
         max_length=255,
         null=True,
         blank=False,
-        default='XXXX'
+        default=generate_confirmation_code
+    )
+    token_version = models.PositiveIntegerField(
+        'версия токенов',
+        default=0,
+        editable=False,
     )
 
+    # Поля, которые копируются в токен доступа. Их изменение
+    # увеличивает token_version, и старые токены перестают им верить.
+    TOKEN_CLAIM_FIELDS = ('username', 'role', 'is_staff', 'is_active')
+
     @property
     def is_user(self):
         return self.role == USER
@@ -80,6 +118,30 @@ class User(AbstractUser):
     def is_moderator(self):
         return self.role == MODERATOR
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_claims = instance.token_claims()
+        return instance
+
+    def token_claims(self):
+        return {
+            field: self.__dict__[field] for field in self.TOKEN_CLAIM_FIELDS
+            if field in self.__dict__
+        }
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, '_loaded_claims', {})
+        if any(getattr(self, field) != value
+               for field, value in loaded.items()):
+            self.token_version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {
+                    *kwargs['update_fields'], 'token_version'
+                }
+        super().save(*args, **kwargs)
+        self._loaded_claims = self.token_claims()
+
     class Meta:
         ordering = ('id',)
         verbose_name = 'Пользователь'
@@ -89,14 +151,35 @@ class User(AbstractUser):
         return self.username
 
 
-@receiver(post_save, sender=User)
-def post_save(sender, instance, created, **kwargs):
-    if created:
-        confirmation_code = default_token_generator.make_token(
-            instance
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку."""
+
+    subject = models.CharField("тема", max_length=255)
+    body = models.TextField("текст")
+    from_email = models.CharField("отправитель", max_length=254, blank=True)
+    to_email = models.EmailField("получатель", max_length=254)
+    created = models.DateTimeField("создано", auto_now_add=True)
+    attempts = models.PositiveSmallIntegerField("попыток", default=0)
+    next_attempt_at = models.DateTimeField(
+        "следующая попытка",
+        default=timezone.now,
+    )
+    sent_at = models.DateTimeField("отправлено", blank=True, null=True)
+    last_error = models.TextField("последняя ошибка", blank=True)
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = (
+            models.Index(
+                fields=('sent_at', 'next_attempt_at'),
+                name='outgoing_email_due_idx',
+            ),
         )
-        instance.confirmation_code = confirmation_code
-        instance.save()
+
+    def __str__(self):
+        return f'{self.to_email}: {self.subject}'
 
 
 class DefaultModel(models.Model):
@@ -127,6 +210,9 @@ class Genre(DefaultModel):
         verbose_name = "Жанр"
         verbose_name_plural = "Жанры"
         default_related_name = "genres"
+        indexes = (
+            models.Index(Upper("slug"), name="genre_slug_upper_idx"),
+        )
 
 
 class Category(DefaultModel):
@@ -135,6 +221,73 @@ class Category(DefaultModel):
         verbose_name = "Категория"
         verbose_name_plural = "Категории"
         default_related_name = "categories"
+        indexes = (
+            models.Index(Upper("slug"), name="category_slug_upper_idx"),
+        )
+
+
+class TitleQuerySet(models.QuerySet):
+
+    def update_rating(self, added=None, removed=None):
+        """Атомарно учитывает добавленную и снятую оценку произведений.
+
+        Сдвигает сумму и количество оценок и счётчики гистограммы.
+        """
+        score_delta = (added or 0) - (removed or 0)
+        count_delta = (added is not None) - (removed is not None)
+        new_sum = F("rating_sum") + score_delta
+        new_count = F("rating_count") + count_delta
+        histogram = {}
+        if added != removed:
+            if added is not None:
+                field = score_count_field(added)
+                histogram[field] = F(field) + 1
+            if removed is not None:
+                field = score_count_field(removed)
+                histogram[field] = F(field) - 1
+        return self.update(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            rating=Case(
+                When(
+                    rating_count__gt=-count_delta,
+                    then=ExpressionWrapper(
+                        Cast(new_sum, FloatField()) / new_count,
+                        output_field=FloatField(),
+                    ),
+                ),
+                default=None,
+                output_field=FloatField(),
+            ),
+            **histogram,
+        )
+
+    def recompute_ratings(self):
+        """Пересчитывает рейтинг и гистограмму оценок по всем отзывам."""
+        reviews = Review.objects.filter(
+            title=OuterRef("pk")
+        ).order_by().values("title")
+        score_sum = reviews.annotate(total=Sum("score")).values("total")
+        score_count = reviews.annotate(total=Count("pk")).values("total")
+        histogram = {
+            score_count_field(score): Coalesce(
+                Subquery(reviews.annotate(
+                    total=Count("pk", filter=Q(score=score))
+                ).values("total")),
+                Value(0),
+            )
+            for score in SCORES
+        }
+        return self.update(
+            rating_sum=Coalesce(Subquery(score_sum), Value(0)),
+            rating_count=Coalesce(Subquery(score_count), Value(0)),
+            rating=ExpressionWrapper(
+                Cast(Subquery(score_sum), FloatField())
+                / Subquery(score_count),
+                output_field=FloatField(),
+            ),
+            **histogram,
+        )
 
 
 class Title(models.Model):
@@ -142,11 +295,9 @@ class Title(models.Model):
     name = models.CharField(
         verbose_name="Название",
         max_length=256,
-        db_index=True,
     )
     year = models.PositiveSmallIntegerField(
         verbose_name="Год создания",
-        db_index=True,
         validators=[MaxValueValidator(get_current_year)],
     )
     description = models.TextField(
@@ -167,24 +318,139 @@ class Title(models.Model):
         null=True,
         related_name="titles"
     )
+    rating_sum = models.PositiveIntegerField(
+        verbose_name="Сумма оценок",
+        default=0,
+        editable=False,
+    )
+    rating_count = models.PositiveIntegerField(
+        verbose_name="Количество оценок",
+        default=0,
+        editable=False,
+    )
+    rating = models.FloatField(
+        verbose_name="Рейтинг",
+        blank=True,
+        null=True,
+        editable=False,
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         ordering = ("name",)
         verbose_name = "Произведение"
         verbose_name_plural = "Произведения"
+        # Индексы (поле, id) для ?ordering= и фильтров по этим полям.
+        # В PostgreSQL для rating нужен ещё индекс с NULLS FIRST, его
+        # создаёт reviews.db.create_postgres_indexes.
+        indexes = (
+            models.Index(Upper("name"), name="title_name_upper_idx"),
+            models.Index(fields=("name", "id"), name="title_name_idx"),
+            models.Index(fields=("year", "id"), name="title_year_idx"),
+            models.Index(fields=("rating", "id"), name="title_rating_idx"),
+            models.Index(
+                fields=("rating_count", "id"), name="title_rating_count_idx"
+            ),
+        )
 
     def __str__(self):
         return self.name
 
+    def save(self, force_insert=False, force_update=False, using=None,
+             update_fields=None):
+        """При обновлении не перезаписывает рейтинг и гистограмму.
+
+        Их меняет только TitleQuerySet.update_rating при записи отзыва:
+        экземпляр, прочитанный раньше, затёр бы их старыми значениями.
+        """
+        if not self._state.adding and not force_insert and (
+            update_fields is None
+        ):
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in RATING_FIELDS
+            ]
+        super().save(force_insert, force_update, using, update_fields)
+
+    @property
+    def score_histogram(self):
+        return {
+            score: getattr(self, score_count_field(score))
+            for score in SCORES
+        }
+
+    @property
+    def score_median(self):
+        """Медиана оценок, вычисленная по гистограмме."""
+        if not self.rating_count:
+            return None
+        histogram = self.score_histogram
+
+        def score_at(position):
+            for score, count in histogram.items():
+                if position < count:
+                    return score
+                position -= count
+
+        return (
+            score_at((self.rating_count - 1) // 2)
+            + score_at(self.rating_count // 2)
+        ) / 2
+
+
+for score in SCORES:
+    Title.add_to_class(score_count_field(score), models.PositiveIntegerField(
+        verbose_name=f"Оценок {score}",
+        default=0,
+        editable=False,
+    ))
+
 
 class GenreTitle(models.Model):
-    genre = models.ForeignKey(Genre, on_delete=models.CASCADE)
+    # Поиск по genre обслуживает индекс (genre, title).
+    genre = models.ForeignKey(Genre, on_delete=models.CASCADE,
+                              db_index=False)
     title = models.ForeignKey(Title, on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = (
+            # Покрывающий индекс для фильтра произведений по жанрам.
+            models.Index(
+                fields=("genre", "title"), name="genretitle_genre_title_idx"
+            ),
+        )
+
     def __str__(self):
         return f"{self.genre} {self.title}"
 
 
+class BulkCreateQuerySet(models.QuerySet):
+
+    def bulk_create_with_pks(self, objs):
+        """bulk_create, после которого у объектов заполнены id.
+
+        PostgreSQL возвращает id из INSERT сам. SQLite — нет: строки одной
+        транзакции получают подряд идущие id, а база до её конца
+        заблокирована для других записей, поэтому id берутся как последние
+        по порядку. Для остальных баз это не гарантировано.
+        """
+        with transaction.atomic(using=self.db):
+            self.bulk_create(objs)
+            if not objs or objs[0].pk is not None:
+                return objs
+            if connections[self.db].vendor != "sqlite":
+                raise NotSupportedError(
+                    "База не вернула id созданных строк."
+                )
+            pks = self.order_by("-pk").values_list(
+                "pk", flat=True
+            )[:len(objs)]
+            for obj, pk in zip(objs, reversed(pks)):
+                obj.pk = pk
+        return objs
+
+
 class Review(models.Model):
     text = models.CharField(max_length=128)
     author = models.ForeignKey(User, on_delete=models.CASCADE,
@@ -199,9 +465,25 @@ class Review(models.Model):
     title = models.ForeignKey(Title, on_delete=models.CASCADE,
                               related_name='reviews')
 
+    objects = BulkCreateQuerySet.as_manager()
+
     def __str__(self):
         return self.text
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(
+            zip(field_names, (
+                value for value in values if value is not models.DEFERRED
+            ))
+        )
+        return instance
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     class Meta:
         constraints = (
             UniqueConstraint(
@@ -209,6 +491,12 @@ class Review(models.Model):
                 name='unique_review'
             ),
         )
+        indexes = (
+            models.Index(
+                fields=('title', '-pub_date', '-id'),
+                name='review_title_pub_date_idx',
+            ),
+        )
 
 
 class Comment(models.Model):
@@ -218,3 +506,210 @@ class Comment(models.Model):
     pub_date = models.DateField(auto_now_add=True)
     review = models.ForeignKey(Review, on_delete=models.CASCADE,
                                related_name='comments')
+
+    objects = BulkCreateQuerySet.as_manager()
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('review', '-pub_date', '-id'),
+                name='comment_review_pub_date_idx',
+            ),
+        )
+
+
+class TitleRanking(models.Model):
+    """Материализованный рейтинг произведений для /titles/top/ и trending/.
+
+    weighted_rating — байесовское среднее: оценки произведения вместе с
+    RANKING_MIN_REVIEWS условными оценками, равными средней по каталогу.
+    trend — логарифм суммы exp(k * дней от RANKING_EPOCH) по отзывам,
+    где k задаёт период полураспада. Текущая активность получается
+    вычитанием одного и того же k * (сегодня - RANKING_EPOCH), поэтому
+    порядок по trend не меняется со временем и строки не нужно
+    пересчитывать каждый день.
+    Строки есть только у произведений с отзывами.
+    """
+
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="ranking",
+    )
+    # Копия Title.category_id для /titles/top/?category= по индексу.
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="+",
+    )
+    weighted_rating = models.FloatField(verbose_name="Взвешенный рейтинг")
+    # Средняя оценка каталога, с которой посчитан weighted_rating: запись
+    # отзыва берёт её из строки и не считает заново по всем произведениям.
+    prior = models.FloatField(verbose_name="Средняя оценка каталога")
+    trend = models.FloatField(verbose_name="Активность")
+
+    class Meta:
+        verbose_name = "Рейтинг произведения"
+        verbose_name_plural = "Рейтинги произведений"
+        indexes = (
+            models.Index(
+                fields=("-weighted_rating", "title"),
+                name="ranking_weighted_idx",
+            ),
+            models.Index(
+                fields=("category", "-weighted_rating", "title"),
+                name="ranking_category_weighted_idx",
+            ),
+            models.Index(
+                fields=("-trend", "title"), name="ranking_trend_idx",
+            ),
+        )
+
+    @property
+    def current_trend(self):
+        """Число отзывов, каждый из которых затухает с возрастом."""
+        return math.exp(self.trend - trend_exponent(timezone.localdate()))
+
+
+def trend_exponent(day):
+    rate = math.log(2) / settings.RANKING_TREND_HALF_LIFE_DAYS
+    return rate * (day - RANKING_EPOCH).days
+
+
+def average_score(titles):
+    """Средняя оценка по отзывам произведений titles."""
+    totals = titles.aggregate(
+        score_sum=Sum("rating_sum"), score_count=Sum("rating_count")
+    )
+    if not totals["score_count"]:
+        return 0.0
+    return totals["score_sum"] / totals["score_count"]
+
+
+def ranking_prior(titles):
+    """Средняя оценка, с которой посчитан сохранённый рейтинг.
+
+    Берётся из любой строки TitleRanking, без агрегата по каталогу.
+    Пока рейтинг пуст, оценены только сами titles, и средняя считается
+    по ним.
+    """
+    prior = TitleRanking.objects.values_list("prior", flat=True).first()
+    return average_score(titles) if prior is None else prior
+
+
+def weighted_rating(score_sum, score_count, prior):
+    weight = settings.RANKING_MIN_REVIEWS
+    return (score_sum + weight * prior) / (score_count + weight)
+
+
+def refresh_rankings(title_ids=None):
+    """Пересчитывает TitleRanking по отзывам.
+
+    Без title_ids перестраивает всю таблицу и заново считает среднюю
+    оценку каталога; с title_ids берёт сохранённую. Возвращает число
+    строк рейтинга.
+    """
+    titles = Title.objects.filter(rating_count__gt=0)
+    reviews = Review.objects.order_by()
+    rankings = TitleRanking.objects.all()
+    if title_ids is not None:
+        titles = titles.filter(pk__in=title_ids)
+        reviews = reviews.filter(title_id__in=title_ids)
+        rankings = rankings.filter(title_id__in=title_ids)
+    prior = (
+        average_score(Title.objects.all()) if title_ids is None
+        else ranking_prior(titles)
+    )
+    daily = reviews.values("title_id", "pub_date").annotate(count=Count("pk"))
+    exponents = defaultdict(list)
+    for title_id, day, count in daily.values_list(
+        "title_id", "pub_date", "count"
+    ).iterator():
+        exponents[title_id].append(trend_exponent(day) + math.log(count))
+    objs = []
+    for pk, category_id, score_sum, score_count in titles.values_list(
+        "pk", "category_id", "rating_sum", "rating_count"
+    ).iterator():
+        if pk not in exponents:
+            # Сохранённый рейтинг ещё не пересчитан после удаления отзывов.
+            continue
+        peak = max(exponents[pk])
+        objs.append(TitleRanking(
+            title_id=pk,
+            category_id=category_id,
+            weighted_rating=weighted_rating(score_sum, score_count, prior),
+            prior=prior,
+            trend=peak + math.log(sum(
+                math.exp(exponent - peak) for exponent in exponents[pk]
+            )),
+        ))
+    with transaction.atomic():
+        rankings.delete()
+        TitleRanking.objects.bulk_create(objs, batch_size=1000)
+    return len(objs)
+
+
+def record_review_in_ranking(review):
+    """Учитывает новый отзыв одним UPDATE строки рейтинга."""
+    titles = Title.objects.filter(pk=OuterRef("title_id"))
+    weight = settings.RANKING_MIN_REVIEWS
+    exponent = trend_exponent(review.pub_date)
+    updated = TitleRanking.objects.filter(title_id=review.title_id).update(
+        weighted_rating=ExpressionWrapper(
+            (
+                Cast(Subquery(titles.values("rating_sum")), FloatField())
+                + weight * F("prior")
+            ) / (Subquery(titles.values("rating_count")) + weight),
+            output_field=FloatField(),
+        ),
+        # log(e^trend + e^exponent): новый отзыв самый свежий, поэтому
+        # trend - exponent не больше логарифма числа отзывов за день.
+        trend=Value(exponent) + Ln(Exp(F("trend") - exponent) + 1.0),
+    )
+    if not updated:
+        refresh_rankings([review.title_id])
+
+
+@receiver(post_save, sender=Title)
+def update_ranking_category(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        TitleRanking.objects.filter(title=instance).exclude(
+            category=instance.category_id
+        ).update(category=instance.category_id)
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    titles = Title.objects.filter(pk=instance.title_id)
+    loaded = getattr(instance, "_loaded_values", {})
+    old_title_id = loaded.get("title_id")
+    old_score = loaded.get("score")
+    if created:
+        titles.update_rating(added=instance.score)
+        record_review_in_ranking(instance)
+    elif old_title_id is None or old_score is None:
+        titles.recompute_ratings()
+        refresh_rankings([instance.title_id])
+    elif old_title_id != instance.title_id:
+        Title.objects.filter(pk=old_title_id).update_rating(removed=old_score)
+        titles.update_rating(added=instance.score)
+        refresh_rankings([old_title_id, instance.title_id])
+    elif old_score != instance.score:
+        titles.update_rating(added=instance.score, removed=old_score)
+        refresh_rankings([instance.title_id])
+    instance._loaded_values = {
+        "title_id": instance.title_id,
+        "score": instance.score,
+    }
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    Title.objects.filter(pk=instance.title_id).update_rating(
+        removed=instance.score
+    )
+    refresh_rankings([instance.title_id])
@@ -0,0 +1,327 @@
+"""Полнотекстовый поиск по произведениям, отзывам и комментариям.
+
+Бэкенд выбирается настройкой SEARCH_BACKEND. Индекс обновляется
+сигналами моделей, а после массовой загрузки перестраивается командой
+rebuild_search_index.
+"""
+import re
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_save
+from django.utils.module_loading import import_string
+
+from .models import Comment, Review, Title
+
+TITLE = 'title'
+REVIEW = 'review'
+COMMENT = 'comment'
+MODELS = {TITLE: Title, REVIEW: Review, COMMENT: Comment}
+KINDS = {model: kind for kind, model in MODELS.items()}
+
+TERM_RE = re.compile(r'\w+')
+
+
+def document(kind, obj):
+    """Заголовок и текст, по которым ищется объект."""
+    if kind == TITLE:
+        return obj.name, obj.description or ''
+    return '', obj.text
+
+
+class BaseSearchBackend:
+
+    def setup(self):
+        """Создаёт структуры индекса, если их ещё нет."""
+
+    def index(self, kind, obj):
+        raise NotImplementedError
+
+    def index_many(self, kind, objs):
+        for obj in objs:
+            self.index(kind, obj)
+
+    def remove(self, kind, pk):
+        raise NotImplementedError
+
+    def rebuild(self):
+        raise NotImplementedError
+
+    def search(self, query, kinds, limit):
+        """Возвращает [(kind, pk, rank)], лучшие совпадения первыми."""
+        raise NotImplementedError
+
+    def filter_queryset(self, queryset, query):
+        """Оставляет в queryset объекты, подходящие под запрос."""
+        raise NotImplementedError
+
+
+class SQLiteFTS5Backend(BaseSearchBackend):
+    """Индекс в виртуальной таблице FTS5.
+
+    rowid строки кодирует тип и id объекта, поэтому обновление и
+    удаление одного документа — поиск по первичному ключу.
+    """
+
+    table = 'reviews_search_index'
+    kind_codes = {TITLE: 1, REVIEW: 2, COMMENT: 3}
+    kind_base = 4
+    batch_size = 2000
+
+    def rowid(self, kind, pk):
+        return pk * self.kind_base + self.kind_codes[kind]
+
+    @staticmethod
+    def match_expression(query):
+        terms = TERM_RE.findall(query)
+        return ' '.join(f'"{term}"' for term in terms)
+
+    def setup(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} '
+                "USING fts5(name, body, tokenize='unicode61')"
+            )
+
+    def index(self, kind, obj):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT OR REPLACE INTO {self.table} (rowid, name, body) '
+                'VALUES (%s, %s, %s)',
+                (self.rowid(kind, obj.pk), *document(kind, obj)),
+            )
+
+    def index_many(self, kind, objs):
+        with connection.cursor() as cursor:
+            self.insert_many(cursor, [
+                (self.rowid(kind, obj.pk), *document(kind, obj))
+                for obj in objs
+            ])
+
+    def remove(self, kind, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE rowid = %s',
+                (self.rowid(kind, pk),),
+            )
+
+    def rebuild(self):
+        self.setup()
+        # Одна транзакция: пока открыт курсор iterator(), WAL не может
+        # начаться заново, и каждая отдельная вставка дописывала бы его.
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            for kind, model in MODELS.items():
+                fields = ('pk', 'name', 'description') if kind == TITLE else (
+                    'pk', 'text'
+                )
+                rows = model.objects.order_by().only(*fields[1:]).iterator(
+                    chunk_size=self.batch_size
+                )
+                batch = []
+                for obj in rows:
+                    batch.append((self.rowid(kind, obj.pk),
+                                  *document(kind, obj)))
+                    if len(batch) == self.batch_size:
+                        self.insert_many(cursor, batch)
+                        batch = []
+                self.insert_many(cursor, batch)
+
+    def insert_many(self, cursor, rows):
+        if rows:
+            cursor.executemany(
+                f'INSERT OR REPLACE INTO {self.table} (rowid, name, body) '
+                'VALUES (%s, %s, %s)',
+                rows,
+            )
+
+    def search(self, query, kinds, limit):
+        expression = self.match_expression(query)
+        if not expression:
+            return []
+        codes = [self.kind_codes[kind] for kind in kinds]
+        placeholders = ', '.join(['%s'] * len(codes))
+        kind_by_code = {code: kind for kind, code in self.kind_codes.items()}
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid, bm25({self.table}, 2.0, 1.0) AS rank '
+                f'FROM {self.table} WHERE {self.table} MATCH %s '
+                f'AND rowid %% {self.kind_base} IN ({placeholders}) '
+                'ORDER BY rank LIMIT %s',
+                (expression, *codes, limit),
+            )
+            return [
+                (
+                    kind_by_code[rowid % self.kind_base],
+                    rowid // self.kind_base,
+                    -rank,
+                )
+                for rowid, rank in cursor.fetchall()
+            ]
+
+    def filter_queryset(self, queryset, query):
+        expression = self.match_expression(query)
+        if not expression:
+            return queryset.none()
+        kind = KINDS[queryset.model]
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid / {self.kind_base} FROM {self.table} '
+            f'WHERE {self.table} MATCH %s '
+            f'AND rowid %% {self.kind_base} = {self.kind_codes[kind]}',
+            (expression,),
+        ))
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """Поиск по tsvector, вычисляемому из самих таблиц.
+
+    Отдельного индекса не ведёт: setup() создаёт на таблицах GIN-индексы
+    по тем же выражениям to_tsvector, что и в запросах.
+    """
+
+    config = 'russian'
+
+    def indexes(self):
+        """(модель, GinIndex) по выражению vector() каждого типа.
+
+        Индекс используется, только если его выражение совпадает с
+        выражением запроса, поэтому оба строятся из vector().
+        """
+        from django.contrib.postgres.indexes import GinIndex
+
+        return [
+            (model, GinIndex(
+                self.vector(kind), name=f'{kind}_search_{self.config}_idx'
+            ))
+            for kind, model in MODELS.items()
+        ]
+
+    def setup(self):
+        indexes = self.indexes()
+        with connection.cursor() as cursor:
+            existing = {
+                name
+                for model, _ in indexes
+                for name in connection.introspection.get_constraints(
+                    cursor, model._meta.db_table
+                )
+            }
+        with connection.schema_editor() as editor:
+            for model, index in indexes:
+                if index.name not in existing:
+                    editor.add_index(model, index)
+
+    def vector(self, kind):
+        from django.contrib.postgres.search import SearchVector
+
+        if kind == TITLE:
+            return SearchVector('name', weight='A', config=self.config) + (
+                SearchVector('description', weight='B', config=self.config)
+            )
+        return SearchVector('text', config=self.config)
+
+    def query(self, query):
+        from django.contrib.postgres.search import SearchQuery
+
+        return SearchQuery(query, config=self.config)
+
+    def index(self, kind, obj):
+        pass
+
+    def index_many(self, kind, objs):
+        pass
+
+    def remove(self, kind, pk):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def search(self, query, kinds, limit):
+        from django.contrib.postgres.search import SearchRank
+
+        search_query = self.query(query)
+        hits = []
+        for kind in kinds:
+            vector = self.vector(kind)
+            hits.extend(
+                (kind, pk, rank)
+                for pk, rank in MODELS[kind].objects.annotate(
+                    search=vector, rank=SearchRank(vector, search_query)
+                ).filter(search=search_query).order_by(
+                    '-rank'
+                ).values_list('pk', 'rank')[:limit]
+            )
+        return sorted(hits, key=lambda hit: hit[2], reverse=True)[:limit]
+
+    def filter_queryset(self, queryset, query):
+        kind = KINDS[queryset.model]
+        return queryset.annotate(search=self.vector(kind)).filter(
+            search=self.query(query)
+        )
+
+
+def load_hits(hits):
+    """Подставляет в результаты поиска данные объектов.
+
+    Объекты, удалённые после индексации, пропускаются.
+    """
+    ids = defaultdict(list)
+    for kind, pk, rank in hits:
+        ids[kind].append(pk)
+    objects = {
+        TITLE: Title.objects.only('name').in_bulk(ids[TITLE]),
+        REVIEW: Review.objects.only('title_id', 'text').in_bulk(ids[REVIEW]),
+        COMMENT: Comment.objects.select_related('review').only(
+            'review__title_id', 'text'
+        ).in_bulk(ids[COMMENT]),
+    }
+    results = []
+    for kind, pk, rank in hits:
+        obj = objects[kind].get(pk)
+        if obj is None:
+            continue
+        result = {'type': kind, 'id': pk, 'rank': rank}
+        if kind == TITLE:
+            result.update(title_id=pk, review_id=None, text=obj.name)
+        elif kind == REVIEW:
+            result.update(title_id=obj.title_id, review_id=pk, text=obj.text)
+        else:
+            result.update(
+                title_id=obj.review.title_id,
+                review_id=obj.review_id,
+                text=obj.text,
+            )
+        results.append(result)
+    return results
+
+
+@lru_cache(maxsize=None)
+def load_backend(path):
+    return import_string(path)()
+
+
+def get_backend():
+    return load_backend(settings.SEARCH_BACKEND)
+
+
+def update_index(sender, instance, raw=False, **kwargs):
+    if not raw:
+        get_backend().index(KINDS[sender], instance)
+
+
+def remove_from_index(sender, instance, **kwargs):
+    get_backend().remove(KINDS[sender], instance.pk)
+
+
+def setup_index(sender, **kwargs):
+    get_backend().setup()
+
+
+def connect_signals():
+    for model in MODELS.values():
+        post_save.connect(update_index, sender=model)
+        post_delete.connect(remove_from_index, sender=model)
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Данные записаны в обход сигналов моделей: загрузка из файлов, пересчёт
+# рейтинга. Аргумент models — модели, строки которых изменились.
+data_changed = Signal()
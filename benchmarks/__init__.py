@@ -0,0 +1,55 @@
+"""Бенчмарки YaMDb.
+
+Запускаются из корня репозитория, например::
+
+    python -m benchmarks.query_plans --scale small
+
+Каждый запуск работает с отдельной временной базой SQLite и не трогает
+db.sqlite3 проекта.
+"""
+import atexit
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent / 'api_yamdb'
+
+
+def remove_database(database):
+    # В режиме WAL рядом с базой лежат ещё -wal и -shm.
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(database + suffix):
+            os.remove(database + suffix)
+
+
+def setup_django(database=None):
+    """Настраивает Django на чистую базу и создаёт в ней таблицы.
+
+    Временная база, созданная здесь, удаляется при выходе.
+    Возвращает путь к файлу базы.
+    """
+    if str(PROJECT_DIR) not in sys.path:
+        sys.path.insert(0, str(PROJECT_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+    import django
+    from django.conf import settings
+    from django.core.management import call_command
+
+    if database is None:
+        handle, database = tempfile.mkstemp(
+            prefix='yamdb-bench-', suffix='.sqlite3'
+        )
+        os.close(handle)
+        atexit.register(remove_database, database)
+    settings.DATABASES['default']['NAME'] = str(database)
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+    settings.DEBUG = False
+    django.setup()
+    call_command('migrate', run_syncdb=True, verbosity=0)
+    return database
@@ -0,0 +1,193 @@
+"""Чтения через ASGI с асинхронными view против WSGI с пулом потоков.
+
+    python -m benchmarks.asgi_vs_wsgi --scale small --concurrency 32
+
+Оба приложения вызываются в процессе, без сетевого сервера: WSGI — из
+пула в --concurrency потоков, ASGI — из --concurrency корутин в одном
+event loop. Для каждого эндпоинта и режима кэша (тёплый кэш ответов,
+If-None-Match, без кэша) выводятся запросы в секунду и перцентили
+задержки.
+"""
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import setup_django
+from benchmarks.runner import percentile, url_params
+
+ENDPOINTS = (
+    ('titles-list', '/api/v1/titles/'),
+    ('titles-detail', '/api/v1/titles/{title_id}/'),
+    ('reviews-list', '/api/v1/titles/{title_id}/reviews/'),
+    ('comments-list',
+     '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'),
+)
+MODES = ('cached', 'not-modified', 'uncached')
+
+
+def summary(latencies, elapsed):
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+def split_url(url):
+    path, _, query = url.partition('?')
+    return path, query
+
+
+def run_wsgi(application, url, headers, requests, concurrency):
+    from io import BytesIO
+
+    path, query = split_url(url)
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': 'testserver',
+        'SERVER_PORT': '80',
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': BytesIO(),
+        'HTTP_ACCEPT': 'application/json',
+    }
+    for name, value in headers.items():
+        environ['HTTP_' + name.upper().replace('-', '_')] = value
+
+    def request():
+        started = time.perf_counter()
+        body = application(dict(environ), lambda status, headers: None)
+        b''.join(body)
+        body.close()
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        started = time.perf_counter()
+        latencies = list(pool.map(lambda _: request(), range(requests)))
+    return summary(latencies, time.perf_counter() - started)
+
+
+def run_asgi(application, url, headers, requests, concurrency):
+    path, query = split_url(url)
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'server': ('testserver', 80),
+        'client': ('127.0.0.1', 0),
+        'headers': [(b'accept', b'application/json')] + [
+            (name.lower().encode(), value.encode())
+            for name, value in headers.items()
+        ],
+    }
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        pass
+
+    async def request():
+        started = time.perf_counter()
+        await application(dict(scope), receive, send)
+        return time.perf_counter() - started
+
+    async def worker(count):
+        return [await request() for _ in range(count)]
+
+    async def main():
+        counts = [requests // concurrency] * concurrency
+        counts[0] += requests % concurrency
+        started = time.perf_counter()
+        results = await asyncio.gather(*(worker(n) for n in counts))
+        return [latency for result in results for latency in result], (
+            time.perf_counter() - started
+        )
+
+    latencies, elapsed = asyncio.run(main())
+    return summary(latencies, elapsed)
+
+
+def prepare(mode, client, url):
+    """Прогревает кэш ответов и возвращает заголовки запроса для режима."""
+    from django.core.cache import cache
+
+    from api.v1.mixins import CachedListMixin
+
+    cache.clear()
+    CachedListMixin.cache_responses = mode != 'uncached'
+    response = client.get(url, HTTP_ACCEPT='application/json')
+    if mode == 'not-modified':
+        return {'If-None-Match': response['ETag']}
+    return {}
+
+
+def run(args):
+    import django
+    from django.conf import settings
+    from django.core.asgi import get_asgi_application
+    from django.core.wsgi import get_wsgi_application
+    from django.test import Client
+    from django.urls import clear_url_caches
+
+    from benchmarks.datagen import SCALES, seed_database
+
+    seed_database(SCALES[args.scale], args.seed)
+    params, _ = url_params()
+    client = Client()
+    applications = (
+        ('wsgi', settings.ROOT_URLCONF, get_wsgi_application(), run_wsgi),
+        ('asgi', 'benchmarks.async_urls', get_asgi_application(), run_asgi),
+    )
+    endpoints = {}
+    for name, url in ENDPOINTS:
+        url = url.format(**params)
+        endpoints[name] = {}
+        for mode in MODES:
+            endpoints[name][mode] = {}
+            for server, urlconf, application, runner in applications:
+                settings.ROOT_URLCONF = urlconf
+                clear_url_caches()
+                headers = prepare(mode, client, url)
+                endpoints[name][mode][server] = runner(
+                    application, url, headers,
+                    args.requests, args.concurrency,
+                )
+    return {
+        'scale': args.scale,
+        'seed': args.seed,
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'django': django.get_version(),
+        'endpoints': endpoints,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--scale', default='small')
+    parser.add_argument('--seed', default=0, type=int)
+    parser.add_argument('--requests', default=500, type=int)
+    parser.add_argument('--concurrency', default=32, type=int)
+    args = parser.parse_args()
+
+    setup_django()
+    print(json.dumps(run(args), ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,9 @@
+"""URLconf для ASGI-прогона: list/retrieve обслуживаются асинхронно."""
+from django.urls import include, path
+
+from api.v1.async_views import async_read_urls
+from api.v1.urls import v1_router
+
+urlpatterns = [
+    path('api/v1/', include((async_read_urls(v1_router.urls), 'api'))),
+]
@@ -0,0 +1,169 @@
+"""Детерминированный генератор данных в формате static/data.
+
+Одинаковые scale и seed всегда дают одинаковые файлы, поэтому
+результаты разных запусков бенчмарков можно сравнивать.
+"""
+import csv
+import io
+import random
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+
+FIRST_ID = 1
+BASE_DATE = datetime(2020, 1, 1)
+ROLES = ('user', 'user', 'user', 'moderator', 'admin')
+WORDS = (
+    'драма', 'комедия', 'фильм', 'книга', 'песня', 'герой', 'время',
+    'город', 'любовь', 'война', 'мир', 'ночь', 'дорога', 'море', 'сон',
+    'the', 'last', 'night', 'star', 'road', 'king', 'dream', 'city',
+)
+
+
+@dataclass(frozen=True)
+class Scale:
+    users: int
+    categories: int
+    genres: int
+    titles: int
+    genres_per_title: int
+    reviews_per_title: int
+    comments_per_review: int
+
+
+SCALES = {
+    'tiny': Scale(20, 3, 8, 50, 2, 5, 1),
+    'small': Scale(200, 5, 20, 2_000, 2, 10, 1),
+    'medium': Scale(2_000, 10, 50, 20_000, 3, 20, 2),
+    'large': Scale(20_000, 10, 100, 200_000, 3, 20, 2),
+    'catalogue': Scale(1_000, 10, 100, 1_000_000, 3, 0, 0),
+}
+
+
+def sentence(rng, words=6):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def timestamp(rng):
+    moment = BASE_DATE + timedelta(seconds=rng.randrange(3 * 365 * 86400))
+    return moment.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+
+def generate_categories(scale, rng):
+    for pk in range(FIRST_ID, FIRST_ID + scale.categories):
+        yield {'id': pk, 'name': f'Категория {pk}', 'slug': f'category-{pk}'}
+
+
+def generate_genres(scale, rng):
+    for pk in range(FIRST_ID, FIRST_ID + scale.genres):
+        yield {'id': pk, 'name': f'Жанр {pk}', 'slug': f'genre-{pk}'}
+
+
+def generate_users(scale, rng):
+    for pk in range(FIRST_ID, FIRST_ID + scale.users):
+        yield {
+            'id': pk,
+            'username': f'user{pk}',
+            'email': f'user{pk}@yamdb.fake',
+            'role': rng.choice(ROLES),
+            'bio': '',
+            'first_name': '',
+            'last_name': '',
+        }
+
+
+def generate_titles(scale, rng):
+    for pk in range(FIRST_ID, FIRST_ID + scale.titles):
+        yield {
+            'id': pk,
+            'name': f'{sentence(rng, 3)} {pk}',
+            'year': rng.randrange(1900, 2023),
+            'category': rng.randrange(FIRST_ID,
+                                      FIRST_ID + scale.categories),
+        }
+
+
+def generate_genre_titles(scale, rng):
+    pk = FIRST_ID
+    genres = range(FIRST_ID, FIRST_ID + scale.genres)
+    for title_id in range(FIRST_ID, FIRST_ID + scale.titles):
+        for genre_id in rng.sample(genres, scale.genres_per_title):
+            yield {'id': pk, 'title_id': title_id, 'genre_id': genre_id}
+            pk += 1
+
+
+def generate_reviews(scale, rng):
+    pk = FIRST_ID
+    users = range(FIRST_ID, FIRST_ID + scale.users)
+    for title_id in range(FIRST_ID, FIRST_ID + scale.titles):
+        for author in rng.sample(users, scale.reviews_per_title):
+            yield {
+                'id': pk,
+                'title_id': title_id,
+                'text': sentence(rng),
+                'author': author,
+                'score': rng.randint(1, 10),
+                'pub_date': timestamp(rng),
+            }
+            pk += 1
+
+
+def generate_comments(scale, rng):
+    pk = FIRST_ID
+    reviews = scale.titles * scale.reviews_per_title
+    for review_id in range(FIRST_ID, FIRST_ID + reviews):
+        for _ in range(scale.comments_per_review):
+            yield {
+                'id': pk,
+                'review_id': review_id,
+                'text': sentence(rng),
+                'author': rng.randrange(FIRST_ID, FIRST_ID + scale.users),
+                'pub_date': timestamp(rng),
+            }
+            pk += 1
+
+
+# Имена и колонки совпадают с файлами в api_yamdb/static/data.
+FILES = (
+    ('category.csv', ('id', 'name', 'slug'), generate_categories),
+    ('genre.csv', ('id', 'name', 'slug'), generate_genres),
+    ('users.csv', ('id', 'username', 'email', 'role', 'bio',
+                   'first_name', 'last_name'), generate_users),
+    ('titles.csv', ('id', 'name', 'year', 'category'), generate_titles),
+    ('genre_title.csv', ('id', 'title_id', 'genre_id'),
+     generate_genre_titles),
+    ('review.csv', ('id', 'title_id', 'text', 'author', 'score',
+                    'pub_date'), generate_reviews),
+    ('comments.csv', ('id', 'review_id', 'text', 'author', 'pub_date'),
+     generate_comments),
+)
+
+
+def write_csv(directory, scale, seed=0):
+    """Записывает csv-файлы и возвращает каталог с ними."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for filename, columns, generate in FILES:
+        rng = random.Random(f'{seed}:{filename}')
+        with open(directory / filename, 'w', encoding='utf-8',
+                  newline='') as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(generate(scale, rng))
+    return directory
+
+
+def seed_database(scale, seed=0, batch_size=5000):
+    """Генерирует данные и загружает их командой import_csv."""
+    from django.core.management import call_command
+    from django.db import connection
+
+    with tempfile.TemporaryDirectory(prefix='yamdb-data-') as directory:
+        write_csv(directory, scale, seed)
+        call_command(
+            'import_csv', path=Path(directory), batch_size=batch_size,
+            stdout=io.StringIO(),
+        )
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
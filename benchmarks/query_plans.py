@@ -0,0 +1,130 @@
+"""Планы и время горячих запросов без индексов и с ними.
+
+    python -m benchmarks.query_plans --scale small
+
+Индексы из Meta моделей сначала удаляются, запросы выполняются и
+объясняются, затем индексы создаются заново и замер повторяется.
+"""
+import argparse
+import json
+import time
+
+from benchmarks import setup_django
+
+# (модель, имя индекса) — индексы, ради которых написан бенчмарк.
+INDEXES = (
+    ('Review', 'review_title_pub_date_idx'),
+    ('Comment', 'comment_review_pub_date_idx'),
+    ('Title', 'title_name_upper_idx'),
+    ('Genre', 'genre_slug_upper_idx'),
+    ('GenreTitle', 'genretitle_genre_title_idx'),
+    ('Category', 'category_slug_upper_idx'),
+    ('Title', 'title_rating_idx'),
+    ('Title', 'title_rating_count_idx'),
+)
+
+
+def hot_queries():
+    from api.v1.filters import TitleFilter, TitleOrderingFilter
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    from reviews.models import Comment, Genre, Review, Title
+
+    title = Title.objects.order_by('pk')[Title.objects.count() // 2]
+    review = Review.objects.filter(title=title).first()
+    genre = Genre.objects.order_by('pk').last()
+
+    def titles(**params):
+        return TitleFilter(params, queryset=Title.objects.all()).qs[:10]
+
+    def ordered_titles(ordering):
+        request = Request(APIRequestFactory().get('/', {'ordering': ordering}))
+        return TitleOrderingFilter().filter_queryset(
+            request, Title.objects.all(), view=None
+        )[:10]
+
+    return {
+        'reviews_of_title': Review.objects.filter(
+            title=title
+        ).order_by('-pub_date', '-id')[:10],
+        'review_by_title_and_pk': Review.objects.filter(
+            pk=review.pk, title=title.pk
+        ),
+        'comments_of_review': Comment.objects.filter(
+            review=review
+        ).order_by('-pub_date', '-id')[:10],
+        'title_by_name': titles(name=title.name.lower()),
+        'titles_by_genre': titles(genre=genre.slug.upper()),
+        'titles_by_category': titles(category=title.category.slug.upper()),
+        'titles_by_rating': ordered_titles('-rating'),
+        'titles_by_rating_count': ordered_titles('-rating_count'),
+    }
+
+
+def measure(queries, repeat):
+    result = {}
+    for name, queryset in queries.items():
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(queryset.all())
+            timings.append(time.perf_counter() - started)
+        result[name] = {
+            'plan': queryset.explain(),
+            'best_ms': round(min(timings) * 1000, 3),
+        }
+    return result
+
+
+def set_indexes(enabled):
+    from django.apps import apps
+    from django.db import connection
+
+    with connection.schema_editor() as editor:
+        for model_name, index_name in INDEXES:
+            model = apps.get_model('reviews', model_name)
+            index = next(
+                index for index in model._meta.indexes
+                if index.name == index_name
+            )
+            if enabled:
+                editor.add_index(model, index)
+            else:
+                editor.remove_index(model, index)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scale', default='small')
+    parser.add_argument('--seed', default=0, type=int)
+    parser.add_argument('--repeat', default=20, type=int)
+    args = parser.parse_args()
+
+    setup_django()
+    from benchmarks.datagen import SCALES, seed_database
+
+    seed_database(SCALES[args.scale], args.seed)
+    queries = hot_queries()
+    set_indexes(enabled=False)
+    before = measure(queries, args.repeat)
+    set_indexes(enabled=True)
+    after = measure(queries, args.repeat)
+    print(json.dumps(
+        {
+            'scale': args.scale,
+            'seed': args.seed,
+            'queries': {
+                name: {'before': before[name], 'after': after[name]}
+                for name in queries
+            },
+        },
+        ensure_ascii=False,
+        indent=2,
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,437 @@
+"""Нагрузочный прогон всех маршрутов api/v1 через тестовый клиент Django.
+
+    python -m benchmarks.runner --scale small --requests 200 > result.json
+    python -m benchmarks.runner --baseline result.json
+
+Для каждого эндпоинта в JSON выводятся запросы в секунду, перцентили
+задержки, число SQL-запросов и пик выделенной памяти на запрос; пиковый
+RSS — один на весь прогон. С --baseline результат сравнивается с
+прошлым прогоном того же масштаба и режима кэша, и при замедлении
+больше --threshold команда завершается с кодом 1.
+"""
+import argparse
+import json
+import platform
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from itertools import count
+
+from benchmarks import setup_django
+
+READ_ENDPOINTS = (
+    ('titles-list', '/api/v1/titles/', None),
+    ('titles-list-100', '/api/v1/titles/?limit=100', None),
+    ('titles-filter', '/api/v1/titles/?genre={genre}&year={year}', None),
+    ('titles-detail', '/api/v1/titles/{title_id}/', None),
+    ('genres-list', '/api/v1/genres/', None),
+    ('genres-search', '/api/v1/genres/?search=1', None),
+    ('categories-list', '/api/v1/categories/', None),
+    ('reviews-list', '/api/v1/titles/{title_id}/reviews/', None),
+    ('reviews-list-cursor',
+     '/api/v1/titles/{title_id}/reviews/?cursor=', None),
+    ('reviews-detail',
+     '/api/v1/titles/{title_id}/reviews/{review_id}/', None),
+    ('comments-list',
+     '/api/v1/titles/{title_id}/reviews/{review_id}/comments/', None),
+    ('comments-detail',
+     '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+     '{comment_id}/', None),
+    ('users-list', '/api/v1/users/', 'admin'),
+    ('users-detail', '/api/v1/users/{username}/', 'admin'),
+    ('users-me', '/api/v1/users/me/', 'admin'),
+    ('titles-ordering', '/api/v1/titles/?ordering=-rating', None),
+    ('titles-stats', '/api/v1/titles/{title_id}/stats/', None),
+    ('titles-top', '/api/v1/titles/top/', None),
+    ('titles-trending', '/api/v1/titles/trending/', None),
+    ('search', '/api/v1/search/?search=фильм', None),
+    ('export-titles', '/api/v1/export/titles/', 'admin'),
+)
+# Количество объектов в одном запросе к /reviews/bulk/ и /comments/bulk/.
+BULK_ITEMS = 10
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def peak_rss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss в Linux в килобайтах, в macOS в байтах.
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def url_params():
+    from reviews.models import Comment, Review, User
+
+    review = Review.objects.filter(comments__isnull=False).order_by(
+        'pk'
+    ).first() or Review.objects.order_by('pk').first()
+    title = review.title
+    admin = User.objects.filter(role='admin').order_by('pk').first()
+    return {
+        'title_id': title.pk,
+        'review_id': review.pk,
+        'comment_id': Comment.objects.filter(review=review).first().pk,
+        'genre': title.genre.first().slug,
+        'category': title.category.slug,
+        'year': title.year,
+        'username': admin.username,
+        'user': User.objects.filter(role='user').order_by('pk').first(),
+    }, admin
+
+
+def make_clients(admin):
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    admin_client = APIClient()
+    admin_client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}'
+    )
+    return {None: APIClient(), 'admin': admin_client}
+
+
+def get(client, url):
+    response = client.get(url)
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response
+
+
+class Writes:
+    """Маршруты записи: (имя, request(prepared), prepare или None).
+
+    prepare() через ORM создаёт то, что запрос удалит или куда он
+    запишет, и в замер не входит. Созданное запросами остаётся в базе.
+    """
+
+    def __init__(self, clients, params, admin):
+        from reviews.models import User
+
+        self.anonymous, self.client = clients[None], clients['admin']
+        self.params, self.admin = params, admin
+        self.numbers = count()
+        self.title_url = f'/api/v1/titles/{params["title_id"]}/'
+        self.review_url = (
+            f'{self.title_url}reviews/{params["review_id"]}/'
+        )
+        self.authors = list(User.objects.order_by('pk').values_list(
+            'username', flat=True
+        )[:BULK_ITEMS])
+
+    def unique(self, prefix):
+        return f'{prefix}{next(self.numbers)}'
+
+    def create(self, url, data):
+        return lambda _: self.client.post(url, data(), format='json')
+
+    def update(self, url, data):
+        return lambda _: self.client.patch(url, data(), format='json')
+
+    def delete(self, url=lambda prepared: prepared):
+        return lambda prepared: self.client.delete(url(prepared))
+
+    def new_title(self):
+        from reviews.models import Title
+
+        return Title.objects.create(name=self.unique('Бенчмарк '), year=2000)
+
+    def new_review(self):
+        from reviews.models import Review
+
+        title = self.new_title()
+        review = Review.objects.create(
+            title=title, author=self.admin, text='Текст', score=5
+        )
+        return f'/api/v1/titles/{title.pk}/reviews/{review.pk}/'
+
+    def new_comment(self):
+        from reviews.models import Comment
+
+        comment = Comment.objects.create(
+            review_id=self.params['review_id'], author=self.admin,
+            text='Текст',
+        )
+        return f'{self.review_url}comments/{comment.pk}/'
+
+    def new_user(self):
+        from reviews.models import User
+
+        username = self.unique('bench_user')
+        User.objects.create(
+            username=username, email=f'{username}@yamdb.fake'
+        )
+        return f'/api/v1/users/{username}/'
+
+    def new_slug(self, model, name, prefix):
+        return model.objects.create(name=name, slug=self.unique(prefix)).slug
+
+    def signup(self, _):
+        username = self.unique('bench')
+        return self.anonymous.post('/api/v1/auth/signup/', {
+            'username': username,
+            'email': f'{username}@yamdb.fake',
+        })
+
+    def token(self, _):
+        from reviews.models import User
+
+        user = User.objects.order_by('pk').first()
+        return self.anonymous.post('/api/v1/auth/token/', {
+            'username': user.username,
+            'confirmation_code': user.confirmation_code,
+        })
+
+    def create_review(self, title_id):
+        return self.client.post(
+            f'/api/v1/titles/{title_id}/reviews/',
+            {'text': 'Текст', 'score': 5}, format='json',
+        )
+
+    def bulk_reviews(self, title_id):
+        return self.client.post('/api/v1/reviews/bulk/', [
+            {'title': title_id, 'author': author, 'text': 'Текст',
+             'score': 5}
+            for author in self.authors
+        ], format='json')
+
+    def new_user_data(self):
+        username = self.unique('bench_user')
+        return {'username': username, 'email': f'{username}@yamdb.fake'}
+
+    def catalogue(self):
+        from reviews.models import Category, Genre
+
+        return (
+            ('genres-create', self.create('/api/v1/genres/', lambda: {
+                'name': 'Жанр', 'slug': self.unique('bench-genre-'),
+            }), None),
+            ('genres-delete',
+             self.delete(lambda slug: f'/api/v1/genres/{slug}/'),
+             lambda: self.new_slug(Genre, 'Жанр', 'bench-genre-')),
+            ('categories-create', self.create('/api/v1/categories/', lambda: {
+                'name': 'Категория', 'slug': self.unique('bench-category-'),
+            }), None),
+            ('categories-delete',
+             self.delete(lambda slug: f'/api/v1/categories/{slug}/'),
+             lambda: self.new_slug(Category, 'Категория', 'bench-category-')),
+            ('titles-create', self.create('/api/v1/titles/', lambda: {
+                'name': self.unique('Бенчмарк '), 'year': 2000,
+                'genre': [self.params['genre']],
+                'category': self.params['category'],
+            }), None),
+            ('titles-update', self.update(self.title_url, lambda: {
+                'description': self.unique('Описание '),
+            }), None),
+            ('titles-delete',
+             self.delete(lambda pk: f'/api/v1/titles/{pk}/'),
+             lambda: self.new_title().pk),
+        )
+
+    def discussions(self):
+        comments_url = f'{self.review_url}comments/'
+        comment_url = f'{comments_url}{self.params["comment_id"]}/'
+        return (
+            ('reviews-create', self.create_review,
+             lambda: self.new_title().pk),
+            ('reviews-update', self.update(self.review_url, lambda: {
+                'score': next(self.numbers) % 10 + 1,
+            }), None),
+            ('reviews-delete', self.delete(), self.new_review),
+            ('reviews-bulk', self.bulk_reviews,
+             lambda: self.new_title().pk),
+            ('comments-create', self.create(comments_url, lambda: {
+                'text': 'Текст',
+            }), None),
+            ('comments-update', self.update(comment_url, lambda: {
+                'text': self.unique('Текст '),
+            }), None),
+            ('comments-delete', self.delete(), self.new_comment),
+            ('comments-bulk', self.create('/api/v1/comments/bulk/', lambda: [
+                {'review': self.params['review_id'], 'text': 'Текст'}
+            ] * BULK_ITEMS), None),
+        )
+
+    def users(self):
+        bio = lambda: {'bio': self.unique('Био ')}  # noqa: E731
+        return (
+            ('auth-signup', self.signup, None),
+            ('auth-token', self.token, None),
+            ('users-create',
+             self.create('/api/v1/users/', self.new_user_data), None),
+            ('users-update', self.update(
+                f'/api/v1/users/{self.params["user"].username}/', bio
+            ), None),
+            ('users-me-update', self.update('/api/v1/users/me/', bio), None),
+            ('users-delete', self.delete(), self.new_user),
+        )
+
+    def __iter__(self):
+        yield from self.users()
+        yield from self.catalogue()
+        yield from self.discussions()
+
+
+def count_queries(request):
+    """Выполняет запрос и возвращает его статус и число SQL-запросов.
+
+    queries_log не подходит: его очищает сигнал request_started.
+    """
+    from django.db import connection
+
+    executed = []
+
+    def counter(execute, sql, params, many, context):
+        executed.append(sql)
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(counter):
+        status = request().status_code
+    return status, len(executed)
+
+
+def run_endpoint(request, requests, warmup, prepare=None):
+    """Замеры одного эндпоинта.
+
+    Каждый вызов request получает результат своего prepare(); время
+    prepare() в замер не входит.
+    """
+    prepare = prepare or (lambda: None)
+    for _ in range(warmup):
+        request(prepare())
+    prepared = prepare()
+    status, queries = count_queries(lambda: request(prepared))
+    prepared = prepare()
+    tracemalloc.start()
+    request(prepared)
+    _, peak_alloc = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies = []
+    for _ in range(requests):
+        prepared = prepare()
+        request_started = time.perf_counter()
+        request(prepared)
+        latencies.append(time.perf_counter() - request_started)
+    return {
+        'status': status,
+        'requests': requests,
+        'rps': round(requests / sum(latencies), 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 3),
+        'queries': queries,
+        'peak_alloc_kb': peak_alloc // 1024,
+    }
+
+
+def run(args):
+    import django
+
+    from benchmarks.datagen import SCALES, seed_database
+
+    seed_database(SCALES[args.scale], args.seed)
+    params, admin = url_params()
+    clients = make_clients(admin)
+    endpoints = {}
+    for name, url, client in READ_ENDPOINTS:
+        if args.only and name not in args.only:
+            continue
+        url = url.format(**params)
+        endpoints[name] = run_endpoint(
+            lambda _: get(clients[client], url), args.requests, args.warmup
+        )
+    for name, request, prepare in Writes(clients, params, admin):
+        if args.only and name not in args.only:
+            continue
+        endpoints[name] = run_endpoint(
+            request, args.requests, args.warmup, prepare
+        )
+    return {
+        'scale': args.scale,
+        'seed': args.seed,
+        'cache': not args.no_cache,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        # ru_maxrss — пик всего процесса, по эндпоинтам он не делится.
+        'peak_rss_kb': peak_rss_kb(),
+        'endpoints': endpoints,
+    }
+
+
+def incomparable(result, baseline):
+    """Причина, по которой прогоны нельзя сравнивать, или None."""
+    if result['scale'] != baseline['scale']:
+        return 'Сравнивать можно только прогоны одного масштаба.'
+    if result['cache'] != baseline['cache']:
+        return 'Сравнивать можно только прогоны с одним режимом кэша.'
+    return None
+
+
+def compare(result, baseline, threshold):
+    """Возвращает эндпоинты, у которых p50 вырос больше чем на threshold."""
+    reason = incomparable(result, baseline)
+    if reason:
+        raise ValueError(reason)
+    regressions = {}
+    for name, current in result['endpoints'].items():
+        previous = baseline['endpoints'].get(name)
+        if previous is None:
+            continue
+        ratio = current['p50_ms'] / previous['p50_ms']
+        if ratio > 1 + threshold or current['queries'] > previous['queries']:
+            regressions[name] = {
+                'p50_ms': [previous['p50_ms'], current['p50_ms']],
+                'queries': [previous['queries'], current['queries']],
+            }
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--scale', default='small')
+    parser.add_argument('--seed', default=0, type=int)
+    parser.add_argument('--requests', default=100, type=int)
+    parser.add_argument('--warmup', default=5, type=int)
+    parser.add_argument('--only', nargs='*', help='Имена эндпоинтов.')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Отключить кэш ответов.')
+    parser.add_argument('--baseline', help='JSON прошлого прогона.')
+    parser.add_argument('--threshold', default=0.2, type=float)
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        reason = incomparable(
+            {'scale': args.scale, 'cache': not args.no_cache}, baseline
+        )
+        if reason:
+            parser.error(reason)
+    setup_django()
+    if args.no_cache:
+        from django.conf import settings
+        settings.CACHES['default']['BACKEND'] = (
+            'django.core.cache.backends.dummy.DummyCache'
+        )
+    result = run(args)
+    if baseline is not None:
+        result['regressions'] = compare(result, baseline, args.threshold)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if result.get('regressions'):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""Время фильтров списка произведений на большом каталоге.
+
+    python -m benchmarks.title_filters --scale catalogue
+
+Для каждого набора параметров ?genre=, ?genre_mode=, ?year= и
+?year_min=/?year_max= замеряются оба запроса списка: страница из 10
+произведений и COUNT для пагинации. Рядом замеряется прежний вариант
+фильтра — join с жанрами через iexact и DISTINCT, — если он был.
+Генерация каталога на миллион произведений занимает минуты, поэтому
+базу можно сохранить через --database и переиспользовать.
+"""
+import argparse
+import json
+import os
+import time
+
+from benchmarks import setup_django
+from benchmarks.runner import percentile
+
+PAGE_SIZE = 10
+
+
+def legacy_queryset(params):
+    """Фильтр в прежнем виде или None, если такого фильтра не было."""
+    from django.db.models import Q
+
+    from reviews.models import Title
+
+    queryset = Title.objects.all()
+    slugs = params.get('genre', '').split(',')
+    if params.get('year_min') or params.get('year_max'):
+        return None
+    if params.get('year'):
+        queryset = queryset.filter(year__iexact=params['year'])
+    if len(slugs) == 1 and slugs[0]:
+        return queryset.filter(genre__slug__iexact=slugs[0])
+    if params.get('genre_mode') == 'all':
+        for slug in slugs:
+            queryset = queryset.filter(genre__slug__iexact=slug)
+        return queryset.distinct()
+    if slugs[0]:
+        condition = Q()
+        for slug in slugs:
+            condition |= Q(genre__slug__iexact=slug)
+        return queryset.filter(condition).distinct()
+    return queryset
+
+
+def current_queryset(params):
+    from api.v1.filters import TitleFilter
+    from reviews.models import Title
+
+    return TitleFilter(params, queryset=Title.objects.all()).qs
+
+
+def cases():
+    from reviews.models import Genre
+
+    first, second = Genre.objects.order_by('pk').values_list(
+        'slug', flat=True
+    )[:2]
+    return {
+        'year': {'year': '1999'},
+        'year_range': {'year_min': '1990', 'year_max': '1999'},
+        'genre': {'genre': first.upper()},
+        'genres_any': {'genre': f'{first},{second}'},
+        'genres_all': {'genre': f'{first},{second}', 'genre_mode': 'all'},
+        'genre_and_years': {
+            'genre': first, 'year_min': '1990', 'year_max': '1999'
+        },
+    }
+
+
+def measure(queryset, repeat):
+    pages, counts = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        list(queryset.all()[:PAGE_SIZE])
+        pages.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        total = queryset.count()
+        counts.append(time.perf_counter() - started)
+    return {
+        'count': total,
+        'page_p50_ms': round(percentile(pages, 0.50) * 1000, 3),
+        'count_p50_ms': round(percentile(counts, 0.50) * 1000, 3),
+        'plan': queryset.all()[:PAGE_SIZE].explain(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--scale', default='catalogue')
+    parser.add_argument('--seed', default=0, type=int)
+    parser.add_argument('--repeat', default=5, type=int)
+    parser.add_argument('--database',
+                        help='Файл базы; заполняется, если ещё пуст.')
+    args = parser.parse_args()
+
+    fresh = args.database is None or not os.path.exists(args.database)
+    setup_django(args.database)
+    from benchmarks.datagen import SCALES, seed_database
+    from reviews.models import Title
+
+    if fresh or not Title.objects.exists():
+        seed_database(SCALES[args.scale], args.seed)
+    result = {}
+    for name, params in cases().items():
+        legacy = legacy_queryset(params)
+        result[name] = {
+            'params': params,
+            'legacy': (
+                None if legacy is None else measure(legacy, args.repeat)
+            ),
+            'current': measure(current_queryset(params), args.repeat),
+        }
+    print(json.dumps(
+        {
+            'scale': args.scale,
+            'seed': args.seed,
+            'titles': Title.objects.count(),
+            'cases': result,
+        },
+        ensure_ascii=False,
+        indent=2,
+    ))
+
+
+if __name__ == '__main__':
+    main()
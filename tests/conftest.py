@@ -1,6 +1,7 @@
 import os
 import sys
 
+import pytest
 from django.utils.version import get_version
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -33,3 +34,32 @@ assert get_version() < '4.0.0', 'Пожалуйста, используйте в
 pytest_plugins = [
     'tests.fixtures.fixture_user',
 ]
+
+
+@pytest.fixture(autouse=True)
+def immediate_email_queue(settings):
+    """Письма из запросов отправляются сразу и попадают в mail.outbox."""
+    settings.EMAIL_QUEUE_BACKEND = 'reviews.mail.ImmediateQueue'
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(settings):
+    """Свой кэш в памяти, который не переживает очистку тестовой базы.
+
+    Кэш проекта, настроенный через окружение, тесты не трогают.
+    """
+    from django.core.cache import cache
+
+    from api.v1.cache import pending_stats
+
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'yamdb-tests',
+        'OPTIONS': {'MAX_ENTRIES': 100_000},
+    }}
+
+    cache.clear()
+    pending_stats.clear()
+    yield
+    cache.clear()
+    pending_stats.clear()
@@ -0,0 +1,101 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+
+    def get_title(self, client, title_id):
+        response = client.get(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id)
+        )
+        assert response.status_code == HTTPStatus.OK
+        return response.json()
+
+    def test_01_rating_follows_review_writes(self, admin_client, user_client,
+                                             moderator_client, client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        assert self.get_title(client, title_id).get('rating') is None, (
+            'Проверьте, что у произведения без отзывов рейтинг равен `None`.'
+        )
+
+        create_single_review(user_client, title_id, 'Неплохо', 4)
+        review = create_single_review(
+            moderator_client, title_id, 'Отлично', 8
+        ).json()
+        assert self.get_title(client, title_id).get('rating') == 6, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'создании отзыва.'
+        )
+
+        url = self.REVIEW_DETAIL_URL_TEMPLATE.format(
+            title_id=title_id, review_id=review['id']
+        )
+        response = moderator_client.patch(url, data={'score': 10})
+        assert response.status_code == HTTPStatus.OK
+        assert self.get_title(client, title_id).get('rating') == 7, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'изменении оценки в отзыве.'
+        )
+
+        response = moderator_client.delete(url)
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.get_title(client, title_id).get('rating') == 4, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'удалении отзыва.'
+        )
+
+    def test_02_recompute_ratings_command(self, admin_client, user_client,
+                                          client):
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(user_client, title_id, 'Неплохо', 5)
+        Title.objects.update(rating_sum=0, rating_count=0, rating=None)
+
+        call_command('recompute_ratings')
+        title = Title.objects.get(pk=title_id)
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            5, 1, 5.0
+        ), (
+            'Проверьте, что команда `recompute_ratings` восстанавливает '
+            'рейтинг произведения по отзывам.'
+        )
+        assert Title.objects.get(pk=titles[1]['id']).rating is None
+
+    def test_03_title_save_keeps_rating(self, admin_client, user_client,
+                                        client):
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        stale = Title.objects.get(pk=title_id)
+        create_single_review(user_client, title_id, 'Хорошо', 7)
+        stale.description = 'Новое описание'
+        stale.save()
+
+        title = Title.objects.get(pk=title_id)
+        assert title.description == 'Новое описание'
+        assert (title.rating_count, title.rating, title.score_7_count) == (
+            1, 7.0, 1
+        ), (
+            'Проверьте, что сохранение произведения, прочитанного до записи '
+            'отзыва, не затирает рейтинг и гистограмму оценок.'
+        )
+        response = admin_client.patch(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id),
+            data={'name': 'Новое название'},
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert self.get_title(client, title_id)['rating'] == 7
@@ -0,0 +1,81 @@
+import datetime
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09ImportCSV:
+
+    def test_01_import_static_data(self):
+        from reviews.models import Comment, Review, Title, User
+
+        call_command('import_csv', batch_size=7)
+
+        assert User.objects.filter(username='bingobongo').exists(), (
+            'Проверьте, что команда `import_csv` загружает пользователей.'
+        )
+        codes = list(User.objects.values_list('confirmation_code', flat=True))
+        assert all(codes) and len(set(codes)) == len(codes), (
+            'Проверьте, что пользователи, загруженные командой `import_csv`, '
+            'получают уникальные коды подтверждения.'
+        )
+        review = Review.objects.get(pk=1)
+        assert review.pub_date == datetime.date(2019, 9, 24), (
+            'Проверьте, что команда `import_csv` сохраняет дату публикации '
+            'из файла.'
+        )
+        assert Comment.objects.filter(review_id=6).count() == 3, (
+            'Проверьте, что команда `import_csv` загружает комментарии.'
+        )
+        title = Title.objects.get(pk=review.title_id)
+        scores = list(
+            Review.objects.filter(title=title).values_list('score', flat=True)
+        )
+        assert title.rating == sum(scores) / len(scores), (
+            'Проверьте, что после загрузки отзывов пересчитывается рейтинг '
+            'произведений.'
+        )
+
+    def test_02_import_skip_existing(self):
+        from reviews.models import Genre
+
+        call_command('import_csv')
+        genres = Genre.objects.count()
+        Genre.objects.order_by('pk').last().delete()
+        output = StringIO()
+        call_command('import_csv', skip_existing=True, stdout=output)
+        assert Genre.objects.count() == genres, (
+            'Проверьте, что повторная загрузка с `--skip-existing` не '
+            'дублирует записи.'
+        )
+        assert f'genre.csv: записано 1, пропущено {genres - 1}' in (
+            output.getvalue()
+        ), (
+            'Проверьте, что `--skip-existing` считает записанными только '
+            'действительно вставленные строки.'
+        )
+
+    def test_03_import_checks_header(self, tmp_path):
+        from django.core.management.base import CommandError
+
+        from reviews.models import Genre, Review
+
+        data_dir = tmp_path / 'data'
+        data_dir.mkdir()
+        (data_dir / 'genre.csv').write_text(
+            'id,name,slug\n1,Драма,drama\n', encoding='utf-8'
+        )
+        (data_dir / 'review.csv').write_text(
+            'id,title,text,author,score,pub_date\n'
+            '1,1,Текст,1,5,2019-09-24T21:08:21.567Z\n',
+            encoding='utf-8',
+        )
+        with pytest.raises(CommandError, match='title_id'):
+            call_command('import_csv', path=data_dir)
+        assert not Genre.objects.exists() and not Review.objects.exists(), (
+            'Проверьте, что `import_csv` проверяет заголовки всех файлов до '
+            'загрузки и при нехватке столбца завершается ошибкой, а не '
+            'пропускает все строки.'
+        )
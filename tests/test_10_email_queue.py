@@ -0,0 +1,121 @@
+import threading
+import warnings
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore', DeprecationWarning)
+    asyncore = pytest.importorskip('asyncore')
+    smtpd = pytest.importorskip('smtpd')
+
+
+class CollectingSMTPServer(smtpd.SMTPServer):
+    """Локальный отладочный SMTP-сервер, запоминающий письма."""
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), None)
+        self.port = self.socket.getsockname()[1]
+        self.messages = []
+
+    def process_message(self, peer, mailfrom, rcpttos, data, **kwargs):
+        self.messages.append((rcpttos, data))
+
+
+@pytest.fixture
+def smtp_server(settings):
+    server = CollectingSMTPServer()
+    thread = threading.Thread(
+        target=asyncore.loop, kwargs={'timeout': 0.05}, daemon=True
+    )
+    thread.start()
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+    settings.EMAIL_HOST = '127.0.0.1'
+    settings.EMAIL_PORT = server.port
+    settings.EMAIL_USE_TLS = False
+    settings.EMAIL_HOST_USER = ''
+    settings.EMAIL_HOST_PASSWORD = ''
+    yield server
+    server.close()
+    thread.join()
+
+
+@pytest.fixture
+def outbox_queue(settings):
+    settings.EMAIL_QUEUE_BACKEND = 'reviews.mail.OutboxQueue'
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10EmailQueue:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+
+    def signup(self, client, username):
+        response = client.post(self.URL_SIGNUP, data={
+            'email': f'{username}@yamdb.fake',
+            'username': username,
+        })
+        assert response.status_code == HTTPStatus.OK
+        return response
+
+    def test_01_signup_enqueues_email(self, client, outbox_queue):
+        from reviews.models import OutgoingEmail
+
+        outbox_before_count = len(mail.outbox)
+        self.signup(client, 'queued_user')
+        assert len(mail.outbox) == outbox_before_count, (
+            'Проверьте, что при очереди исходящих письмо не отправляется '
+            'в рамках запроса.'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.to_email == 'queued_user@yamdb.fake'
+        assert email.sent_at is None
+
+    def test_02_worker_sends_over_smtp(self, client, outbox_queue,
+                                       smtp_server):
+        from reviews.models import OutgoingEmail, User
+
+        for idx in range(3):
+            self.signup(client, f'queued_user{idx}')
+        call_command('send_queued_emails', batch_size=2)
+        assert OutgoingEmail.objects.filter(sent_at__isnull=True).count() == 1
+        call_command('send_queued_emails')
+
+        assert not OutgoingEmail.objects.filter(sent_at__isnull=True), (
+            'Проверьте, что команда `send_queued_emails` отправляет все '
+            'письма из очереди.'
+        )
+        recipients = sorted(rcpt[0] for rcpt, _ in smtp_server.messages)
+        assert recipients == [
+            f'queued_user{idx}@yamdb.fake' for idx in range(3)
+        ]
+        code = User.objects.get(username='queued_user0').confirmation_code
+        assert code in smtp_server.messages[0][1].decode()
+
+    def test_03_worker_retries_with_backoff(self, client, outbox_queue,
+                                            settings):
+        from reviews.models import OutgoingEmail
+
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+        settings.EMAIL_HOST = '127.0.0.1'
+        settings.EMAIL_PORT = 1
+        settings.EMAIL_USE_TLS = False
+        self.signup(client, 'queued_user')
+
+        call_command('send_queued_emails')
+        email = OutgoingEmail.objects.get()
+        assert email.sent_at is None and email.attempts == 1, (
+            'Проверьте, что при ошибке SMTP письмо остаётся в очереди.'
+        )
+        assert email.last_error
+        next_attempt_at = email.next_attempt_at
+
+        call_command('send_queued_emails')
+        email.refresh_from_db()
+        assert email.attempts == 1, (
+            'Проверьте, что повторная отправка откладывается до '
+            '`next_attempt_at`.'
+        )
+        assert email.next_attempt_at == next_attempt_at
@@ -0,0 +1,156 @@
+import pytest
+
+TITLES_COUNT = 15
+GENRES_PER_TITLE = 3
+PAGE_SIZE = 100
+
+
+@pytest.fixture
+def catalogue(admin, user, moderator):
+    from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                                Title)
+
+    category = Category.objects.create(name='Фильм', slug='films')
+    genres = [
+        Genre.objects.create(name=f'Жанр {idx}', slug=f'genre-{idx}')
+        for idx in range(GENRES_PER_TITLE)
+    ]
+    titles = [
+        Title.objects.create(
+            name=f'Произведение {idx}', year=2000, category=category
+        )
+        for idx in range(TITLES_COUNT)
+    ]
+    GenreTitle.objects.bulk_create(
+        GenreTitle(title=title, genre=genre)
+        for title in titles for genre in genres
+    )
+    title = titles[0]
+    reviews = [
+        Review.objects.create(title=title, author=author, text='Текст',
+                              score=idx)
+        for idx, author in enumerate((admin, user, moderator), 1)
+    ]
+    for author in (admin, user, moderator):
+        Comment.objects.create(review=reviews[0], author=author, text='Да')
+    return title, reviews[0], category, genres
+
+
+# Бюджет запросов к БД для каждого эндпоинта чтения из api/v1/urls.py.
+# Он не должен зависеть от числа объектов на странице.
+QUERY_BUDGETS = (
+    ('/api/v1/titles/', 3),
+    ('/api/v1/titles/?limit=100', 3),
+    ('/api/v1/titles/{title_id}/', 2),
+    ('/api/v1/genres/', 2),
+    ('/api/v1/genres/?limit=100', 2),
+    ('/api/v1/categories/', 2),
+    ('/api/v1/titles/{title_id}/reviews/', 2),
+    ('/api/v1/titles/{title_id}/reviews/?cursor=', 1),
+    ('/api/v1/titles/{title_id}/reviews/{review_id}/', 1),
+    ('/api/v1/titles/{title_id}/reviews/{review_id}/comments/', 2),
+    ('/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+     '?cursor=', 1),
+    ('/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+     '{comment_id}/', 1),
+)
+
+ADMIN_QUERY_BUDGETS = (
+    ('/api/v1/users/', 3),
+    ('/api/v1/users/?limit=100', 3),
+    ('/api/v1/users/{username}/', 2),
+    ('/api/v1/users/me/', 1),
+)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11QueryCount:
+
+    @staticmethod
+    def format_url(url, catalogue, admin):
+        title, review, _, _ = catalogue
+        return url.format(
+            title_id=title.id,
+            review_id=review.id,
+            comment_id=review.comments.first().id,
+            username=admin.username,
+        )
+
+    @pytest.mark.parametrize('url,budget', QUERY_BUDGETS)
+    def test_01_read_endpoints(self, client, catalogue, admin, url, budget,
+                               django_assert_max_num_queries):
+        url = self.format_url(url, catalogue, admin)
+        with django_assert_max_num_queries(budget):
+            response = client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+            'статусом 200.'
+        )
+
+    @pytest.mark.parametrize('url,budget', ADMIN_QUERY_BUDGETS)
+    def test_02_admin_read_endpoints(self, admin_client, catalogue, admin,
+                                     url, budget,
+                                     django_assert_max_num_queries):
+        url = self.format_url(url, catalogue, admin)
+        with django_assert_max_num_queries(budget):
+            response = admin_client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET-запрос администратора к `{url}` возвращает '
+            'ответ со статусом 200.'
+        )
+
+    def test_03_title_genres_are_prefetched(self, client, catalogue):
+        response = client.get('/api/v1/titles/?limit=100')
+        titles = response.json()['results']
+        assert len(titles) == TITLES_COUNT
+        for title in titles:
+            assert [genre['slug'] for genre in title['genre']] == [
+                f'genre-{idx}' for idx in range(GENRES_PER_TITLE)
+            ], (
+                'Проверьте, что жанры произведения возвращаются полностью и '
+                'отсортированы по названию.'
+            )
+
+    def test_04_review_page_constant_queries(self, client, catalogue,
+                                             django_assert_num_queries):
+        from reviews.models import Comment, Review, User
+
+        title, review, _, _ = catalogue
+        User.objects.bulk_create(
+            User(username=f'reader{idx}', email=f'reader{idx}@yamdb.fake')
+            for idx in range(PAGE_SIZE)
+        )
+        authors = User.objects.filter(username__startswith='reader')
+        Review.objects.bulk_create(
+            Review(title=title, author=author, text='Текст', score=5)
+            for author in authors
+        )
+        Comment.objects.bulk_create(
+            Comment(review=review, author=author, text='Да')
+            for author in authors
+        )
+        for url in (
+            f'/api/v1/titles/{title.id}/reviews/',
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+        ):
+            with django_assert_num_queries(2):
+                response = client.get(f'{url}?limit={PAGE_SIZE}')
+            results = response.json()['results']
+            assert len(results) == PAGE_SIZE
+            assert all(item['author'] for item in results), (
+                f'Проверьте, что `{url}` возвращает username авторов, '
+                'получая их тем же запросом, что и страницу.'
+            )
+
+    def test_05_missing_parent(self, client, catalogue):
+        title, review, _, _ = catalogue
+        for url in (
+            '/api/v1/titles/0/reviews/',
+            f'/api/v1/titles/0/reviews/{review.id}/comments/',
+            f'/api/v1/titles/{title.id}/reviews/0/comments/',
+        ):
+            response = client.get(url)
+            assert response.status_code == 404, (
+                f'Проверьте, что GET-запрос к `{url}` для несуществующего '
+                'родителя возвращает ответ со статусом 404.'
+            )
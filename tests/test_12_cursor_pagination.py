@@ -0,0 +1,95 @@
+import datetime
+from http import HTTPStatus
+
+import pytest
+
+REVIEWS_COUNT = 11
+
+
+@pytest.fixture
+def reviews(django_user_model):
+    from reviews.models import Category, Comment, Review, Title
+
+    category = Category.objects.create(name='Фильм', slug='films')
+    title = Title.objects.create(name='Фильм', year=2000, category=category)
+    result = []
+    for idx in range(REVIEWS_COUNT):
+        author = django_user_model.objects.create_user(
+            username=f'author{idx}', email=f'author{idx}@yamdb.fake'
+        )
+        review = Review.objects.create(
+            title=title, author=author, text=f'Отзыв {idx}', score=5
+        )
+        Comment.objects.create(
+            review=review, author=author, text=f'Комментарий {idx}'
+        )
+        result.append(review)
+    # Несколько отзывов за один день: курсор должен различать их по id.
+    for idx, review in enumerate(result):
+        Review.objects.filter(pk=review.pk).update(
+            pub_date=datetime.date(2020, 1, 1 + idx // 3)
+        )
+    return title, result
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12CursorPagination:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    def test_01_cursor_walks_all_reviews(self, client, reviews):
+        title, _ = reviews
+        url = (
+            self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+            + '?cursor=&limit=3'
+        )
+        seen = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            data = response.json()
+            assert 'count' not in data, (
+                'Проверьте, что в режиме курсора не считается общее '
+                'количество отзывов.'
+            )
+            assert len(data['results']) <= 3
+            seen.extend(review['id'] for review in data['results'])
+            url = data['next']
+
+        expected = list(
+            title.reviews.order_by('-pub_date', '-id')
+            .values_list('id', flat=True)
+        )
+        assert len(expected) == REVIEWS_COUNT
+        assert seen == expected, (
+            'Проверьте, что курсор обходит все отзывы по убыванию '
+            '(pub_date, id) без пропусков и повторов.'
+        )
+
+    def test_02_limit_offset_is_default(self, client, reviews):
+        title, _ = reviews
+        response = client.get(
+            self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+        )
+        data = response.json()
+        assert data['count'] == REVIEWS_COUNT, (
+            'Проверьте, что без параметра `cursor` сохраняется пагинация '
+            'limit/offset.'
+        )
+
+    def test_03_invalid_cursor(self, client, reviews):
+        title, _ = reviews
+        response = client.get(
+            self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+            + '?cursor=broken'
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_04_comments_cursor(self, client, reviews):
+        title, created = reviews
+        response = client.get(
+            f'/api/v1/titles/{title.id}/reviews/{created[0].id}/comments/'
+            '?cursor='
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert len(response.json()['results']) == 1
@@ -0,0 +1,154 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13ResponseCache:
+
+    TITLES_URL = '/api/v1/titles/'
+    GENRES_URL = '/api/v1/genres/'
+
+    def test_01_repeated_get_is_served_from_cache(
+            self, admin_client, client, django_assert_num_queries):
+        create_titles(admin_client)
+        response = client.get(self.TITLES_URL + '?limit=5&offset=0')
+        assert response['X-Cache'] == 'MISS'
+        with django_assert_num_queries(0):
+            cached = client.get(self.TITLES_URL + '?offset=0&limit=5')
+        assert cached['X-Cache'] == 'HIT', (
+            'Проверьте, что повторный GET-запрос с теми же параметрами в '
+            'другом порядке обслуживается из кэша.'
+        )
+        assert cached.json() == response.json()
+
+    def test_02_review_write_invalidates_titles(self, admin_client,
+                                                user_client, client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'{self.TITLES_URL}{titles[0]["id"]}/'
+        assert client.get(url).json()['rating'] is None
+        assert client.get(url)['X-Cache'] == 'HIT'
+
+        create_single_review(user_client, titles[0]['id'], 'Хорошо', 8)
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что создание отзыва сбрасывает кэш произведений.'
+        )
+        assert response.json()['rating'] == 8
+
+    def test_03_genre_change_invalidates_titles_only_by_model(
+            self, admin_client, client):
+        from reviews.models import Category, Genre
+
+        titles, _, genres = create_titles(admin_client)
+        client.get(self.TITLES_URL)
+        client.get(self.GENRES_URL)
+        client.get('/api/v1/categories/')
+
+        Genre.objects.filter(slug=genres[0]['slug']).get().save()
+        assert client.get(self.TITLES_URL)['X-Cache'] == 'MISS'
+        assert client.get(self.GENRES_URL)['X-Cache'] == 'MISS'
+        assert client.get('/api/v1/categories/')['X-Cache'] == 'HIT', (
+            'Проверьте, что изменение жанра не сбрасывает кэш категорий.'
+        )
+
+        Category.objects.first().delete()
+        assert client.get('/api/v1/categories/')['X-Cache'] == 'MISS'
+
+    def test_04_admin_write_is_visible(self, admin_client, client):
+        client.get(self.GENRES_URL)
+        response = admin_client.post(
+            self.GENRES_URL, data={'name': 'Ужасы', 'slug': 'horror'}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert client.get(self.GENRES_URL).json()['count'] == 1
+
+    def test_05_stats(self, client, capsys):
+        client.get(self.GENRES_URL)
+        client.get(self.GENRES_URL)
+        call_command('api_cache_stats')
+        output = capsys.readouterr().out
+        assert 'genres: hits=1 misses=1 hit_rate=50.0%' in output, (
+            'Проверьте, что команда `api_cache_stats` показывает счётчики '
+            'попаданий в кэш.'
+        )
+
+    def test_06_version_changes_after_commit(self, client):
+        from django.db import transaction
+
+        from api.v1.cache import get_version
+        from reviews.models import Genre
+
+        client.get(self.GENRES_URL)
+        before = get_version('genres')
+        with transaction.atomic():
+            Genre.objects.create(name='Ужасы', slug='horror')
+            assert get_version('genres') == before, (
+                'Проверьте, что версия кэша меняется только после фиксации '
+                'транзакции: иначе другой процесс закэширует старые данные '
+                'под новой версией.'
+            )
+        after = get_version('genres')
+        assert after != before
+        Genre.objects.create(name='Драма', slug='drama')
+        assert get_version('genres') not in (before, after)
+        assert client.get(self.GENRES_URL).json()['count'] == 2
+
+    def test_07_default_cache_is_in_memory(self, monkeypatch):
+        import importlib
+
+        from api_yamdb import settings as project_settings
+
+        monkeypatch.delenv('CACHE_BACKEND', raising=False)
+        monkeypatch.delenv('CACHE_MAX_ENTRIES', raising=False)
+        default = importlib.reload(project_settings).CACHES['default']
+        assert default['BACKEND'] == (
+            'django.core.cache.backends.locmem.LocMemCache'
+        ), (
+            'Проверьте, что по умолчанию кэш хранится в памяти процесса: '
+            'файловый кэш перебирает все файлы при каждой записи.'
+        )
+        assert default['OPTIONS']['MAX_ENTRIES'] >= 100_000, (
+            'Проверьте, что у кэша задан MAX_ENTRIES: при стандартных 300 '
+            'записях кэш ответов и версий постоянно вычищается.'
+        )
+
+    def test_08_host_is_part_of_the_key(self, admin_client, client):
+        create_titles(admin_client)
+        url = self.TITLES_URL + '?limit=1'
+        response = client.get(url, HTTP_HOST='evil.example')
+        assert response.json()['next'].startswith('http://evil.example/')
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что ответ на запрос с другим заголовком Host не '
+            'отдаётся из кэша: в нём абсолютные ссылки на чужой хост.'
+        )
+        assert response.json()['next'].startswith('http://testserver/')
+
+    def test_09_hit_does_not_write_to_cache(self, client, settings,
+                                            monkeypatch):
+        from django.core.cache import caches
+
+        settings.API_CACHE_STATS_FLUSH_INTERVAL = 3600
+        client.get(self.GENRES_URL)
+        backend = caches['default']
+        writes = []
+
+        def recording(name, method):
+            def wrapper(*args, **kwargs):
+                writes.append(name)
+                return method(*args, **kwargs)
+            return wrapper
+
+        for name in ('set', 'add', 'incr', 'set_many'):
+            monkeypatch.setattr(
+                backend, name, recording(name, getattr(backend, name))
+            )
+        assert client.get(self.GENRES_URL)['X-Cache'] == 'HIT'
+        assert writes == [], (
+            'Проверьте, что попадание в кэш ничего не пишет в кэш: счётчики '
+            'статистики копятся в памяти процесса.'
+        )
@@ -0,0 +1,153 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import (create_reviews, create_single_comment,
+                         create_single_review, create_titles)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14ConditionalGet:
+
+    def assert_not_modified(self, client, url, etag):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным '
+            '`If-None-Match` возвращает ответ со статусом 304.'
+        )
+        assert not response.content
+        assert response['ETag'] == etag
+
+    def test_01_titles_etag(self, admin_client, user_client, client,
+                            django_assert_max_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        response = client.get(url)
+        etag = response['ETag']
+        assert etag, f'Проверьте, что ответ `{url}` содержит ETag.'
+        with django_assert_max_num_queries(0):
+            self.assert_not_modified(client, url, etag)
+
+        create_single_review(user_client, titles[0]['id'], 'Хорошо', 8)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после изменения данных ETag меняется.'
+        )
+        assert response['ETag'] != etag
+
+    def test_02_genres_etag_ignores_query_order(self, admin_client, client):
+        create_titles(admin_client)
+        etag = client.get('/api/v1/genres/?limit=2&offset=1')['ETag']
+        self.assert_not_modified(
+            client, '/api/v1/genres/?offset=1&limit=2', etag
+        )
+        response = client.get('/api/v1/genres/?limit=3',
+                              HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+
+    def test_03_reviews_etag_is_per_title(self, admin_client, admin, client,
+                                          user_client):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        etag = client.get(url)['ETag']
+        self.assert_not_modified(client, url, etag)
+
+        create_single_review(user_client, titles[1]['id'], 'Другое', 3)
+        self.assert_not_modified(client, url, etag)
+
+        create_single_review(user_client, titles[0]['id'], 'Новый', 3)
+        assert client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        ).status_code == HTTPStatus.OK
+
+    def test_04_comments_etag(self, admin_client, admin, client):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client}
+        )
+        url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+            'comments/'
+        )
+        etag = client.get(url)['ETag']
+        self.assert_not_modified(client, url, etag)
+        create_single_comment(
+            admin_client, titles[0]['id'], reviews[0]['id'], 'Да'
+        )
+        assert client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        ).status_code == HTTPStatus.OK
+
+    def assert_modified(self, client, url, etag, message):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, message
+        assert response.get('X-Cache') != 'HIT', message
+        return response
+
+    def test_05_commands_change_etag(self, client):
+        url = '/api/v1/titles/'
+        etag = client.get(url)['ETag']
+        call_command('import_csv')
+        response = self.assert_modified(
+            client, url, etag,
+            'Проверьте, что после `import_csv` ETag и кэш ответов меняются.'
+        )
+        assert response.json()['count'] > 0
+
+        for command in ('recompute_ratings', 'refresh_rankings'):
+            for path in (url, url + 'top/'):
+                etag = client.get(path)['ETag']
+                call_command(command)
+                self.assert_modified(
+                    client, path, etag,
+                    f'Проверьте, что после `{command}` ETag `{path}` меняется.'
+                )
+
+        reviews_url = '/api/v1/titles/1/reviews/'
+        etag = client.get(reviews_url)['ETag']
+        call_command('import_csv', skip_existing=True)
+        self.assert_modified(
+            client, reviews_url, etag,
+            'Проверьте, что `import_csv` сбрасывает ETag отзывов.'
+        )
+
+    def test_06_author_rename_changes_etag(self, admin_client, admin,
+                                           client):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client}
+        )
+        create_single_comment(
+            admin_client, titles[0]['id'], reviews[0]['id'], 'Да'
+        )
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+        etags = {url: client.get(url)['ETag']
+                 for url in (reviews_url, comments_url)}
+        admin.username = 'renamed'
+        admin.save()
+        for url, etag in etags.items():
+            response = self.assert_modified(
+                client, url, etag,
+                'Проверьте, что смена username автора меняет ETag отзывов и '
+                'комментариев.'
+            )
+            assert response.json()['results'][0]['author'] == 'renamed'
+
+    def test_07_trending_etag_expires(self, client, settings, monkeypatch):
+        import time
+
+        url = '/api/v1/titles/trending/'
+        now = time.time()
+        monkeypatch.setattr(time, 'time', lambda: now)
+        etag = client.get(url)['ETag']
+        self.assert_not_modified(client, url, etag)
+        monkeypatch.setattr(
+            time, 'time', lambda: now + settings.RANKING_TREND_CACHE_TIMEOUT
+        )
+        self.assert_modified(
+            client, url, etag,
+            'Проверьте, что ETag `/titles/trending/` устаревает со временем: '
+            'активность затухает и без новых отзывов.'
+        )
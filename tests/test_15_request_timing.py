@@ -0,0 +1,48 @@
+import json
+import logging
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_titles
+
+
+@pytest.fixture
+def timing_enabled(settings):
+    settings.REQUEST_TIMING = {**settings.REQUEST_TIMING, 'ENABLED': True}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15RequestTiming:
+
+    def test_01_disabled_by_default(self, client):
+        response = client.get('/api/v1/genres/')
+        assert 'Server-Timing' not in response
+
+    def test_02_server_timing_header(self, timing_enabled, admin_client,
+                                     client, caplog):
+        create_titles(admin_client)
+        with caplog.at_level(logging.INFO, logger='api.timing'):
+            response = client.get('/api/v1/titles/')
+        header = response['Server-Timing']
+        for metric in ('db;dur=', 'view;dur=', 'serialize;dur=',
+                       'render;dur=', 'total;dur=', 'queries;desc="3"'):
+            assert metric in header, (
+                f'Проверьте, что заголовок Server-Timing содержит `{metric}`.'
+            )
+        record = json.loads(caplog.records[-1].getMessage())
+        assert record['route'] == 'GET api:api:titles-list'
+        assert record['queries'] == 3
+        assert record['status'] == 200
+
+    def test_03_histograms_command(self, timing_enabled, client, capsys):
+        client.get('/api/v1/genres/')
+        client.get('/api/v1/genres/')
+        call_command('request_timings', reset=True)
+        result = json.loads(capsys.readouterr().out)
+        assert result['GET api:api:genres-list']['total']['count'] == 2, (
+            'Проверьте, что команда `request_timings` выводит гистограммы '
+            'по маршрутам.'
+        )
+        call_command('request_timings')
+        assert json.loads(capsys.readouterr().out) == {}
@@ -0,0 +1,144 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import (create_single_comment, create_single_review,
+                         create_titles)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16Search:
+
+    TITLES_URL = '/api/v1/titles/'
+    SEARCH_URL = '/api/v1/search/'
+
+    @pytest.fixture(autouse=True)
+    def empty_index(self, transactional_db):
+        # Очистка базы между тестами идёт в обход сигналов, поэтому
+        # строки прошлых тестов удаляются из индекса явно.
+        from reviews.search import get_backend
+
+        get_backend().rebuild()
+
+    def test_01_titles_search_parameter(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        response = client.get(self.TITLES_URL + '?search=орешек')
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert [title['id'] for title in data['results']] == [
+            titles[1]['id']
+        ], (
+            'Проверьте, что `?search=` находит произведение по слову из '
+            'названия без учёта регистра.'
+        )
+        response = client.get(self.TITLES_URL + '?search=BACK')
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[0]['id']
+        ], 'Проверьте, что `?search=` ищет и по описанию произведения.'
+        response = client.get(self.TITLES_URL + '?search=Рэмбо')
+        assert response.json()['results'] == []
+
+    def test_02_search_endpoint_ranks_all_kinds(self, admin_client,
+                                                user_client, client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review = create_single_review(
+            user_client, title_id, 'Терминатор лучше, чем орешек', 9
+        ).json()
+        create_single_comment(
+            admin_client, title_id, review['id'], 'Согласен про орешек'
+        )
+
+        response = client.get(self.SEARCH_URL + '?search=орешек')
+        assert response.status_code == HTTPStatus.OK
+        results = response.json()['results']
+        assert {result['type'] for result in results} == {
+            'title', 'review', 'comment'
+        }, (
+            'Проверьте, что `/api/v1/search/` ищет по произведениям, '
+            'отзывам и комментариям.'
+        )
+        ranks = [result['rank'] for result in results]
+        assert ranks == sorted(ranks, reverse=True), (
+            'Проверьте, что результаты поиска упорядочены по релевантности.'
+        )
+        comment = next(r for r in results if r['type'] == 'comment')
+        assert comment['title_id'] == title_id
+        assert comment['review_id'] == review['id']
+
+        response = client.get(
+            self.SEARCH_URL + '?search=орешек&type=review&limit=1'
+        )
+        results = response.json()['results']
+        assert [(r['type'], r['id']) for r in results] == [
+            ('review', review['id'])
+        ]
+
+    def test_03_index_follows_updates_and_deletes(self, admin_client,
+                                                  client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'{self.TITLES_URL}{titles[1]["id"]}/'
+        admin_client.patch(url, data={'name': 'Смертельное оружие'})
+        search = self.SEARCH_URL + '?search={}'
+        assert client.get(search.format('орешек')).json()['results'] == [], (
+            'Проверьте, что после изменения названия старое название не '
+            'находится.'
+        )
+        assert len(client.get(search.format('оружие')).json()['results']) == 1
+
+        admin_client.delete(url)
+        assert client.get(search.format('оружие')).json()['results'] == [], (
+            'Проверьте, что удалённое произведение удаляется из индекса.'
+        )
+
+    def test_04_rebuild_and_validation(self, admin_client, client):
+        from reviews.search import get_backend
+
+        titles, _, _ = create_titles(admin_client)
+        get_backend().remove('title', titles[0]['id'])
+        call_command('rebuild_search_index')
+        response = client.get(self.SEARCH_URL + '?search=терминатор')
+        assert [r['id'] for r in response.json()['results']] == [
+            titles[0]['id']
+        ], 'Проверьте, что rebuild_search_index восстанавливает индекс.'
+
+        for query in ('', '?search=', '?search=a&type=user',
+                      '?search=a&limit=0'):
+            response = client.get(self.SEARCH_URL + query)
+            assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = client.get(self.SEARCH_URL + '?search=%22*)')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['results'] == []
+
+    def test_05_postgres_gin_indexes_match_queries(self):
+        pytest.importorskip('psycopg2')
+        import re
+
+        from django.db import connection
+        from django.db.backends.postgresql.base import DatabaseWrapper
+
+        from reviews.search import KINDS, PostgresSearchBackend
+
+        postgres = DatabaseWrapper(
+            {**connection.settings_dict, 'NAME': 'yamdb'}, alias='postgres'
+        )
+        backend = PostgresSearchBackend()
+        with postgres.schema_editor(collect_sql=True, atomic=False) as editor:
+            for model, index in backend.indexes():
+                editor.add_index(model, index)
+        assert len(editor.collected_sql) == 3
+        for (model, _), ddl in zip(backend.indexes(), editor.collected_sql):
+            # Выражение индекса дополнительно обёрнуто в скобки.
+            expression = re.search(r'USING gin \(\((.*)\)\);$', ddl).group(1)
+            queryset = backend.filter_queryset(model.objects.all(), 'война')
+            sql, params = queryset.query.get_compiler(
+                connection=postgres
+            ).as_sql()
+            sql = (sql % tuple(map(repr, params))).replace(
+                f'"{model._meta.db_table}".', ''
+            )
+            assert f'WHERE {expression} @@' in sql, (
+                f'Проверьте, что GIN-индекс для {KINDS[model]} построен по '
+                f'тому же выражению, что и поисковый запрос:\n{ddl}\n{sql}'
+            )
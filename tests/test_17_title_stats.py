@@ -0,0 +1,96 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17TitleStats:
+
+    STATS_URL_TEMPLATE = '/api/v1/titles/{title_id}/stats/'
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+
+    def get_stats(self, client, title_id):
+        response = client.get(
+            self.STATS_URL_TEMPLATE.format(title_id=title_id)
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что GET-запрос к `/api/v1/titles/{title_id}/stats/` '
+            'доступен без токена.'
+        )
+        return response.json()
+
+    def test_01_stats_follow_review_writes(self, admin_client, user_client,
+                                           moderator_client, client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        stats = self.get_stats(client, title_id)
+        assert stats == {
+            'id': title_id,
+            'count': 0,
+            'mean': None,
+            'median': None,
+            'histogram': {str(score): 0 for score in range(1, 11)},
+        }, 'Проверьте статистику произведения без отзывов.'
+
+        create_single_review(user_client, title_id, 'Неплохо', 4)
+        create_single_review(admin_client, title_id, 'Хорошо', 7)
+        review = create_single_review(
+            moderator_client, title_id, 'Отлично', 10
+        ).json()
+        stats = self.get_stats(client, title_id)
+        assert (stats['count'], stats['mean'], stats['median']) == (3, 7, 7)
+        assert [stats['histogram'][str(score)] for score in (4, 7, 10)] == [
+            1, 1, 1
+        ], 'Проверьте, что гистограмма оценок обновляется при создании отзыва.'
+
+        url = self.REVIEW_DETAIL_URL_TEMPLATE.format(
+            title_id=title_id, review_id=review['id']
+        )
+        moderator_client.patch(url, data={'score': 3})
+        stats = self.get_stats(client, title_id)
+        assert stats['histogram']['10'] == 0
+        assert stats['histogram']['3'] == 1, (
+            'Проверьте, что изменение оценки переносит её в другой столбец '
+            'гистограммы.'
+        )
+        assert stats['median'] == 4
+
+        moderator_client.delete(url)
+        stats = self.get_stats(client, title_id)
+        assert (stats['count'], stats['median']) == (2, 5.5), (
+            'Проверьте, что при чётном количестве оценок медиана равна '
+            'среднему двух средних оценок.'
+        )
+        assert sum(stats['histogram'].values()) == 2
+
+    def test_02_stats_single_query_and_recompute(
+            self, admin_client, user_client, client,
+            django_assert_num_queries):
+        from django.core.cache import cache
+
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[1]['id']
+        create_single_review(user_client, title_id, 'Так себе', 2)
+        expected = self.get_stats(client, title_id)
+
+        Title.objects.update(score_2_count=0, rating_count=0)
+        call_command('recompute_ratings')
+        cache.clear()
+        with django_assert_num_queries(1):
+            response = client.get(
+                self.STATS_URL_TEMPLATE.format(title_id=title_id)
+            )
+        assert response.json() == expected, (
+            'Проверьте, что recompute_ratings восстанавливает гистограмму, '
+            'а статистика читается одним запросом.'
+        )
+
+        response = client.get(self.STATS_URL_TEMPLATE.format(title_id=0))
+        assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,225 @@
+import json
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18BulkCreate:
+
+    REVIEWS_BULK_URL = '/api/v1/reviews/bulk/'
+    COMMENTS_BULK_URL = '/api/v1/comments/bulk/'
+
+    def test_01_bulk_reviews_per_item_results(self, admin_client, admin,
+                                              user, moderator, user_client,
+                                              client):
+        from reviews.models import Review, Title
+
+        titles, _, _ = create_titles(admin_client)
+        first, second = titles[0]['id'], titles[1]['id']
+        create_single_review(user_client, first, 'Уже есть', 5)
+        client.get(f'/api/v1/titles/{first}/')
+
+        items = [
+            {'title': first, 'text': 'Отлично', 'score': 9},
+            {'title': second, 'text': 'Хорошо', 'score': 7},
+            {'title': first, 'text': 'Повтор', 'score': 1},
+            {'title': 0, 'text': 'Нет такого', 'score': 5},
+            {'title': second, 'text': 'Без оценки'},
+            {'title': second, 'text': 'Модератор', 'score': 3,
+             'author': moderator.username},
+            {'title': first, 'text': 'От пользователя', 'score': 2,
+             'author': user.username},
+        ]
+        response = admin_client.post(
+            self.REVIEWS_BULK_URL, data=items, format='json'
+        )
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert (data['created'], data['failed']) == (3, 4)
+        statuses = [result['status'] for result in data['results']]
+        assert statuses == [201, 201, 400, 400, 400, 201, 400], (
+            'Проверьте, что для каждого элемента возвращается свой статус: '
+            'повторный отзыв, неизвестное произведение, неполные данные и '
+            'отзыв, уже написанный автором, отклоняются.'
+        )
+        assert 'score' in data['results'][4]['errors']
+        created = Review.objects.get(pk=data['results'][5]['id'])
+        assert (created.author, created.title_id) == (moderator, second), (
+            'Проверьте, что администратор может указать автора отзыва.'
+        )
+        assert created.pub_date is not None
+
+        title = Title.objects.get(pk=first)
+        assert (title.rating_count, title.rating, title.score_9_count) == (
+            2, 7, 1
+        ), 'Проверьте, что после пакетной записи пересчитывается рейтинг.'
+        response = client.get(f'/api/v1/titles/{first}/')
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['rating'] == 7
+        response = client.get('/api/v1/search/?search=Отлично&type=review')
+        assert data['results'][0]['id'] in [
+            r['id'] for r in response.json()['results']
+        ], 'Проверьте, что созданные отзывы попадают в поисковый индекс.'
+
+    def test_02_bulk_comments_ndjson(self, admin_client, user_client,
+                                     moderator_client, moderator):
+        from reviews.models import Comment
+
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review = create_single_review(
+            user_client, title_id, 'Отзыв', 6
+        ).json()
+        comments_url = (
+            f'/api/v1/titles/{title_id}/reviews/{review["id"]}/comments/'
+        )
+        assert user_client.get(comments_url).json()['count'] == 0
+
+        lines = [
+            {'review': review['id'], 'text': f'Комментарий {number}'}
+            for number in range(3)
+        ]
+        lines.append({'review': review['id'], 'text': 'Чужой',
+                      'author': 'admin'})
+        body = '\n'.join(json.dumps(line) for line in lines) + '\n'
+        response = moderator_client.post(
+            self.COMMENTS_BULK_URL, data=body,
+            content_type='application/x-ndjson'
+        )
+        assert response.status_code == HTTPStatus.OK
+        results = response.json()['results']
+        assert [result['status'] for result in results] == [
+            201, 201, 201, 400
+        ], 'Проверьте, что указывать автора может только администратор.'
+        ids = [result['id'] for result in results[:3]]
+        comments = Comment.objects.in_bulk(ids)
+        assert [comments[pk].text for pk in ids] == [
+            line['text'] for line in lines[:3]
+        ], 'Проверьте, что id в ответе соответствуют созданным объектам.'
+        assert all(comments[pk].author == moderator for pk in ids)
+        assert user_client.get(comments_url).json()['count'] == 3
+
+    def test_03_bulk_request_validation(self, admin_client, client,
+                                        user_client,
+                                        django_assert_max_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        item = {'title': titles[0]['id'], 'text': 'Текст', 'score': 5}
+        response = client.post(
+            self.REVIEWS_BULK_URL, data=json.dumps([item]),
+            content_type='application/json'
+        )
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+        for data in ({'title': 1}, []):
+            response = user_client.post(
+                self.REVIEWS_BULK_URL, data=data, format='json'
+            )
+            assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = user_client.post(
+            self.COMMENTS_BULK_URL, data='{"review": 1}\n{',
+            content_type='application/x-ndjson'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+        items = [
+            {'title': title['id'], 'text': 'Текст', 'score': 5}
+            for title in titles
+        ]
+        # Число запросов не зависит от количества отзывов: проверка,
+        # вставка, пересчёт рейтинга и TitleRanking — по одному разу.
+        with django_assert_max_num_queries(18):
+            response = admin_client.post(
+                self.REVIEWS_BULK_URL, data=items, format='json'
+            )
+        assert response.json()['created'] == 2
+
+    def test_04_concurrent_review_is_rejected_per_item(
+            self, admin_client, admin, user, monkeypatch):
+        from api.v1.serializers import ReviewBulkListSerializer
+        from reviews.models import Review
+
+        titles, _, _ = create_titles(admin_client)
+        first, second = titles[0]['id'], titles[1]['id']
+        resolve = ReviewBulkListSerializer.resolve
+
+        def resolve_then_race(serializer):
+            resolve(serializer)
+            # Отзыв того же автора появляется между проверкой и INSERT.
+            Review.objects.create(
+                title_id=first, author=admin, text='Успел', score=4
+            )
+
+        monkeypatch.setattr(
+            ReviewBulkListSerializer, 'resolve', resolve_then_race
+        )
+        response = admin_client.post(
+            self.REVIEWS_BULK_URL,
+            data=[
+                {'title': first, 'text': 'Отлично', 'score': 9},
+                {'title': second, 'text': 'Хорошо', 'score': 7},
+            ],
+            format='json',
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что отзыв, созданный параллельно с пакетной '
+            'записью, не приводит к ошибке 500.'
+        )
+        data = response.json()
+        assert [result['status'] for result in data['results']] == [
+            400, 201
+        ], (
+            'Проверьте, что конфликтующий элемент отклоняется, а остальные '
+            'записываются.'
+        )
+        assert Review.objects.get(pk=data['results'][1]['id']).text == (
+            'Хорошо'
+        )
+        assert Review.objects.filter(title_id=first).get().text == 'Успел'
+
+    def test_05_pk_read_back_only_on_sqlite(self, admin_client, admin,
+                                            user, monkeypatch):
+        from django.db import NotSupportedError, connection
+
+        from reviews.models import Review
+
+        if connection.vendor != 'sqlite':
+            pytest.skip('Проверяется чтение id после INSERT в SQLite.')
+        titles, _, _ = create_titles(admin_client)
+        reviews = Review.objects.bulk_create_with_pks([
+            Review(title_id=title['id'], author=admin, text='Да', score=5)
+            for title in titles
+        ])
+        assert [review.pk for review in reviews] == list(
+            Review.objects.order_by('pk').values_list('pk', flat=True)
+        )
+        monkeypatch.setattr(connection, 'vendor', 'other')
+        with pytest.raises(NotSupportedError):
+            Review.objects.bulk_create_with_pks([
+                Review(title_id=titles[0]['id'], author=user, text='Нет',
+                       score=5)
+            ])
+
+    def test_06_failed_recompute_rolls_back_insert(self, admin_client,
+                                                   monkeypatch):
+        from api.v1 import serializers
+        from reviews.models import Review, Title
+
+        titles, _, _ = create_titles(admin_client)
+
+        def fail(title_ids):
+            raise RuntimeError('refresh_rankings')
+
+        monkeypatch.setattr(serializers, 'refresh_rankings', fail)
+        with pytest.raises(RuntimeError):
+            admin_client.post(
+                self.REVIEWS_BULK_URL,
+                data=[{'title': titles[0]['id'], 'text': 'Да', 'score': 9}],
+                format='json',
+            )
+        assert not Review.objects.exists(), (
+            'Проверьте, что отзывы пакетной записи не сохраняются, если '
+            'пересчёт рейтинга после вставки упал.'
+        )
+        assert Title.objects.get(pk=titles[0]['id']).rating_count == 0
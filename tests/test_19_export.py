@@ -0,0 +1,94 @@
+import csv
+import json
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19Export:
+
+    EXPORT_URL_TEMPLATE = '/api/v1/export/{dataset}/'
+
+    def get_export(self, client, dataset, query=''):
+        response = client.get(
+            self.EXPORT_URL_TEMPLATE.format(dataset=dataset) + query
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.streaming, (
+            'Проверьте, что выгрузка отдаётся через StreamingHttpResponse.'
+        )
+        return b''.join(response.streaming_content).decode(), response
+
+    def test_01_titles_ndjson(self, admin_client, user_client):
+        titles, categories, genres = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'Хорошо', 8)
+        content, response = self.get_export(admin_client, 'titles')
+        assert response['Content-Type'].startswith('application/x-ndjson')
+        records = [json.loads(line) for line in content.splitlines()]
+        assert [record['id'] for record in records] == [
+            title['id'] for title in titles
+        ]
+        first = records[0]
+        assert first['category'] == categories[0]['slug']
+        assert first['genre'] == sorted(titles[0]['genre']), (
+            'Проверьте, что в выгрузку произведений попадают жанры.'
+        )
+        assert (first['rating'], first['rating_count']) == (8, 1)
+        assert records[1]['rating'] is None
+
+    def test_02_csv_round_trip(self, admin_client, user_client,
+                               moderator_client, tmp_path):
+        from reviews.models import Review, Title
+
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'Хорошо, "да"', 8)
+        create_single_review(moderator_client, titles[0]['id'], 'Плохо', 2)
+
+        content, response = self.get_export(
+            admin_client, 'reviews', '?output=csv'
+        )
+        assert response['Content-Disposition'].endswith('"review.csv"')
+        rows = list(csv.DictReader(StringIO(content)))
+        assert list(rows[0]) == [
+            'id', 'title_id', 'text', 'author', 'score', 'pub_date'
+        ], 'Проверьте, что колонки CSV совпадают с static/data/review.csv.'
+        assert rows[0]['text'] == 'Хорошо, "да"'
+
+        call_command(
+            'export_data', 'reviews', output='csv', path=tmp_path,
+            stdout=StringIO()
+        )
+        Review.objects.all().delete()
+        call_command('import_csv', path=tmp_path, stdout=StringIO())
+        assert Review.objects.count() == 2
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_count, title.rating) == (2, 5), (
+            'Проверьте, что выгруженный CSV загружается командой import_csv.'
+        )
+
+    def test_03_command_stdout_and_access(self, admin_client, user_client,
+                                          client):
+        titles, _, _ = create_titles(admin_client)
+        out = StringIO()
+        call_command('export_data', 'titles', stdout=out, chunk_size=1)
+        assert [
+            json.loads(line)['name'] for line in out.getvalue().splitlines()
+        ] == [title['name'] for title in titles], (
+            'Проверьте, что выгрузка по частям не теряет и не повторяет '
+            'строки.'
+        )
+
+        url = self.EXPORT_URL_TEMPLATE.format(dataset='titles')
+        assert client.get(url).status_code == HTTPStatus.UNAUTHORIZED
+        assert user_client.get(url).status_code == HTTPStatus.FORBIDDEN
+        response = admin_client.get(
+            self.EXPORT_URL_TEMPLATE.format(dataset='users')
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        response = admin_client.get(url + '?output=xml')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
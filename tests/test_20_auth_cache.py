@@ -0,0 +1,120 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20AuthCache:
+
+    def test_01_user_is_read_from_cache(self, admin_client, admin,
+                                        django_assert_num_queries):
+        from django.core.cache import cache
+
+        url = f'/api/v1/users/{admin.username}/'
+        cache.clear()
+        with django_assert_num_queries(2):
+            admin_client.get(url)
+        with django_assert_num_queries(1):
+            response = admin_client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что повторный запрос с тем же токеном берёт '
+            'пользователя из кэша, а не из базы.'
+        )
+        with django_assert_num_queries(1):
+            response = admin_client.get('/api/v1/users/me/')
+        assert response.json()['bio'] == admin.bio, (
+            'Проверьте, что `/users/me/` возвращает все поля пользователя.'
+        )
+
+    def test_02_review_write_skips_user_query(self, admin_client,
+                                              user_client, user):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        titles, _, _ = create_titles(admin_client)
+        user_client.get('/api/v1/users/me/')
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(
+                f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+                data={'text': 'Текст', 'score': 5}
+            )
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['author'] == user.username
+        user_queries = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "reviews_user"' in query['sql']
+        ]
+        assert user_queries == [], (
+            'Проверьте, что при записи отзыва пользователь не читается из '
+            'базы.'
+        )
+
+    def test_03_cache_invalidated_on_user_changes(self, admin_client,
+                                                  user_client, user):
+        url = '/api/v1/users/'
+        assert user_client.get(url).status_code == HTTPStatus.FORBIDDEN
+
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'admin'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert user_client.get(url).status_code == HTTPStatus.OK, (
+            'Проверьте, что смена роли сразу действует на права '
+            'пользователя с уже выданным токеном.'
+        )
+
+        user.is_active = False
+        user.save()
+        assert user_client.get(url).status_code == HTTPStatus.UNAUTHORIZED
+
+        user.delete()
+        response = user_client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что удалённый пользователь не проходит '
+            'аутентификацию по закэшированным данным.'
+        )
+
+    def test_04_stale_read_does_not_overwrite_version(self, user):
+        from django.core.cache import cache
+        from django.db import connection
+
+        from api.authentication import get_token_version, version_key
+
+        key = version_key(user.pk)
+        cache.delete(key)
+        stale = user.token_version
+        saved = []
+
+        def save_during_read(execute, sql, params, many, context):
+            result = execute(sql, params, many, context)
+            if '"token_version"' in sql and not saved:
+                saved.append(True)
+                user.role = 'moderator'
+                user.save()
+            return result
+
+        with connection.execute_wrapper(save_during_read):
+            assert get_token_version(user.pk) == stale
+        assert cache.get(key) == stale + 1, (
+            'Проверьте, что версия токенов, прочитанная из базы до '
+            'сохранения пользователя, не затирает в кэше новую.'
+        )
+
+    def test_05_version_written_after_commit(self, user):
+        from django.core.cache import cache
+        from django.db import transaction
+
+        from api.authentication import get_token_version, version_key
+
+        version = get_token_version(user.pk)
+        with transaction.atomic():
+            user.role = 'moderator'
+            user.save()
+            assert cache.get(version_key(user.pk)) == version, (
+                'Проверьте, что новая версия токенов попадает в кэш только '
+                'после фиксации транзакции.'
+            )
+        assert get_token_version(user.pk) == version + 1
@@ -0,0 +1,78 @@
+from http import HTTPStatus
+
+import pytest
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21TokenClaims:
+
+    USERS_URL = '/api/v1/users/'
+
+    @staticmethod
+    def issue_token(client, user):
+        response = client.post('/api/v1/auth/token/', data={
+            'username': user.username,
+            'confirmation_code': user.confirmation_code,
+        })
+        assert response.status_code == HTTPStatus.CREATED
+        return response.json()['token']
+
+    @staticmethod
+    def client_for(token):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return client
+
+    def test_01_token_carries_role_claims(self, client, admin):
+        token = AccessToken(self.issue_token(client, admin))
+        assert (token['username'], token['role']) == (
+            admin.username, 'admin'
+        ), 'Проверьте, что в токен доступа добавлены username и роль.'
+        assert token['ver'] == admin.token_version
+
+    def test_02_no_auth_queries(self, client, admin,
+                                django_assert_num_queries):
+        admin_client = self.client_for(self.issue_token(client, admin))
+        with django_assert_num_queries(2):
+            response = admin_client.get(self.USERS_URL)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что права администратора по токену с ролью '
+            'проверяются без запроса пользователя к базе.'
+        )
+        with django_assert_num_queries(1):
+            response = admin_client.get(self.USERS_URL + 'me/')
+        assert response.json()['email'] == admin.email
+
+    def test_03_role_change_invalidates_claims(self, client, admin_client,
+                                               user):
+        user_client = self.client_for(self.issue_token(client, user))
+        assert user_client.get(self.USERS_URL).status_code == (
+            HTTPStatus.FORBIDDEN
+        )
+        version = user.token_version
+
+        response = admin_client.patch(
+            f'{self.USERS_URL}{user.username}/', data={'role': 'admin'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        user.refresh_from_db()
+        assert user.token_version == version + 1
+        assert user_client.get(self.USERS_URL).status_code == HTTPStatus.OK, (
+            'Проверьте, что после смены роли старый токен не даёт прав по '
+            'роли из токена.'
+        )
+
+        admin_client.patch(
+            f'{self.USERS_URL}{user.username}/', data={'bio': 'Новое'}
+        )
+        user.refresh_from_db()
+        assert user.token_version == version + 1, (
+            'Проверьте, что изменение полей, которых нет в токене, не '
+            'меняет версию токенов.'
+        )
+
+        user.delete()
+        response = user_client.get(self.USERS_URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
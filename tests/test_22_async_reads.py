@@ -0,0 +1,130 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import include, path
+
+from api.v1.async_views import async_read_urls
+from api.v1.urls import v1_router
+from tests.utils import create_titles
+
+urlpatterns = [
+    path('api/v1/', include((async_read_urls(v1_router.urls), 'api'))),
+]
+
+
+@pytest.mark.urls(__name__)
+@pytest.mark.django_db(transaction=True)
+class Test22AsyncReads:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    @staticmethod
+    def request(method, url, **kwargs):
+        # AsyncClient в Django 3.2 принимает заголовки под их именами.
+        async def send():
+            return await getattr(AsyncClient(), method)(url, **kwargs)
+
+        return async_to_sync(send)()
+
+    def get(self, url, **headers):
+        return self.request('get', url, **headers)
+
+    def test_01_list_and_retrieve_are_async(self):
+        from api.v1.mixins import CachedListMixin
+
+        for pattern in async_read_urls(v1_router.urls):
+            view = pattern.callback
+            expected = (
+                issubclass(view.cls, CachedListMixin)
+                and view.actions.get('get') in ('list', 'retrieve')
+            )
+            assert asyncio.iscoroutinefunction(view) == expected, (
+                f'Проверьте обработчик `{pattern.pattern}`: list и retrieve '
+                'кэшируемых вьюсетов должны быть асинхронными, остальные — '
+                'синхронными.'
+            )
+
+    def test_02_cached_response_skips_view(self, admin_client,
+                                           django_assert_num_queries):
+        create_titles(admin_client)
+        url = self.TITLES_URL + '?limit=1'
+        response = self.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert response['X-Cache'] == 'MISS'
+        with django_assert_num_queries(0):
+            cached = self.get(url)
+        assert cached['X-Cache'] == 'HIT', (
+            'Проверьте, что закэшированный ответ отдаётся асинхронным view.'
+        )
+        assert cached.content == response.content
+        assert cached['Content-Type'] == 'application/json'
+
+        with django_assert_num_queries(0):
+            response = self.get(url, **{'If-None-Match': cached['ETag']})
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+        response = self.get(url, Authorization='Bearer invalid')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что запрос с токеном проходит аутентификацию DRF, '
+            'даже если ответ есть в кэше.'
+        )
+        response = self.get(url, Accept='text/html')
+        assert response['Content-Type'].startswith('text/html')
+
+    def test_03_writes_stay_sync(self, admin_client):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        from reviews.models import User
+
+        create_titles(admin_client)
+        admin = User.objects.get(role='admin')
+        response = self.request(
+            'post', '/api/v1/genres/',
+            data=json.dumps({'name': 'Вестерн', 'slug': 'western'}),
+            content_type='application/json',
+            Authorization=f'Bearer {AccessToken.for_user(admin)}',
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        response = self.get('/api/v1/genres/?search=Вестерн')
+        assert [genre['slug'] for genre in response.json()['results']] == [
+            'western'
+        ]
+
+    def test_04_cache_lookup_off_event_loop(self, admin_client,
+                                            monkeypatch, settings, tmp_path):
+        import threading
+
+        from api.v1.mixins import CachedListMixin
+
+        settings.CACHES = {'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path),
+        }}
+        create_titles(admin_client)
+        url = self.TITLES_URL + '?limit=1'
+        self.get(url)
+        threads = []
+        lookup = CachedListMixin.response_without_view
+
+        def recording_lookup(viewset, request):
+            threads.append(threading.get_ident())
+            return lookup(viewset, request)
+
+        monkeypatch.setattr(
+            CachedListMixin, 'response_without_view', recording_lookup
+        )
+
+        async def send():
+            loop_thread = threading.get_ident()
+            response = await AsyncClient().get(url)
+            return loop_thread, response
+
+        loop_thread, response = async_to_sync(send)()
+        assert response['X-Cache'] == 'HIT'
+        assert threads and loop_thread not in threads, (
+            'Проверьте, что файловый кэш читается не в потоке event loop.'
+        )
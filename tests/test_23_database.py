@@ -0,0 +1,101 @@
+import importlib
+
+import pytest
+from django.db import connection
+
+
+@pytest.fixture
+def reload_settings(monkeypatch):
+    """Перечитывает модуль настроек с переменными окружения теста."""
+    import api_yamdb.settings as settings_module
+
+    yield lambda: importlib.reload(settings_module)
+    monkeypatch.undo()
+    importlib.reload(settings_module)
+
+
+def title_filter_sql(database):
+    from api.v1.filters import TitleFilter
+    from reviews.models import Title
+
+    queryset = TitleFilter(
+        {'genre': 'Drama', 'name': 'Фильм', 'year': '2000'},
+        queryset=Title.objects.all(),
+    ).qs
+    sql, params = queryset.query.get_compiler(connection=database).as_sql()
+    return sql % tuple(map(repr, params))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23Database:
+
+    def test_01_sqlite_by_default(self, reload_settings):
+        settings = reload_settings()
+        database = settings.DATABASES['default']
+        assert database['ENGINE'] == 'django.db.backends.sqlite3'
+        assert database['CONN_MAX_AGE'] == 0
+        assert 'DISABLE_SERVER_SIDE_CURSORS' not in database
+        assert settings.SEARCH_BACKEND == 'reviews.search.SQLiteFTS5Backend'
+
+    def test_02_postgres_from_env(self, monkeypatch, reload_settings):
+        monkeypatch.setenv('DB_ENGINE', 'django.db.backends.postgresql')
+        monkeypatch.setenv('DB_NAME', 'yamdb')
+        monkeypatch.setenv('POSTGRES_USER', 'yamdb')
+        monkeypatch.setenv('DB_HOST', 'pgbouncer')
+        monkeypatch.setenv('DB_PORT', '6432')
+        monkeypatch.setenv('DB_CONN_MAX_AGE', '60')
+        monkeypatch.setenv('DB_CONN_HEALTH_CHECKS', '1')
+        monkeypatch.setenv('DB_PGBOUNCER', '1')
+        settings = reload_settings()
+        database = settings.DATABASES['default']
+        assert (database['NAME'], database['HOST'], database['PORT']) == (
+            'yamdb', 'pgbouncer', '6432'
+        )
+        assert database['CONN_MAX_AGE'] == 60
+        assert database['CONN_HEALTH_CHECKS'] is True
+        assert database['DISABLE_SERVER_SIDE_CURSORS'] is True, (
+            'Проверьте, что за PgBouncer серверные курсоры отключены.'
+        )
+        assert settings.SEARCH_BACKEND == (
+            'reviews.search.PostgresSearchBackend'
+        )
+
+    def test_03_health_check_closes_broken_connection(self, client,
+                                                      monkeypatch):
+        closed = []
+        connection.ensure_connection()
+        monkeypatch.setitem(
+            connection.settings_dict, 'CONN_HEALTH_CHECKS', True
+        )
+        monkeypatch.setattr(connection, 'is_usable', lambda: False)
+        monkeypatch.setattr(connection, 'close', lambda: closed.append(1))
+        client.get('/api/v1/genres/')
+        assert closed, (
+            'Проверьте, что оборванное постоянное соединение закрывается '
+            'в начале запроса.'
+        )
+
+        closed.clear()
+        monkeypatch.setitem(
+            connection.settings_dict, 'CONN_HEALTH_CHECKS', False
+        )
+        client.get('/api/v1/genres/')
+        assert not closed
+
+    def test_04_filters_same_sql_on_postgres(self):
+        pytest.importorskip('psycopg2')
+        from django.db.backends.postgresql.base import DatabaseWrapper
+
+        postgres = DatabaseWrapper(
+            {**connection.settings_dict, 'NAME': 'yamdb'}, alias='postgres'
+        )
+        for database in (connection, postgres):
+            sql = title_filter_sql(database)
+            assert 'LIKE' not in sql, (
+                'Проверьте, что фильтры произведений не используют LIKE: '
+                'в PostgreSQL он регистрозависимый.'
+            )
+            # Жанр ищется в подзапросе, таблица жанров в нём — U0.
+            assert "UPPER(U0.\"slug\") = UPPER('Drama')" in sql
+            assert "UPPER(\"reviews_title\".\"name\") = UPPER('Фильм')" in sql
+            assert '"reviews_title"."year" = ' in sql
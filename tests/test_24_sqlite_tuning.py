@@ -0,0 +1,117 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+
+WRITERS = 8
+WRITES_PER_WRITER = 50
+
+
+@pytest.fixture
+def database_file(tmp_path):
+    """Файл базы SQLite: в базе в памяти нет журнала WAL."""
+    settings_dict = {
+        **connection.settings_dict, 'NAME': str(tmp_path / 'stress.sqlite3')
+    }
+    wrapper = DatabaseWrapper(settings_dict, alias='stress')
+    with wrapper.cursor() as cursor:
+        cursor.execute(
+            'CREATE TABLE review (id INTEGER PRIMARY KEY, score INTEGER)'
+        )
+    wrapper.close()
+    return settings_dict
+
+
+def open_connection(settings_dict):
+    # Соединение SQLite можно использовать только в создавшем его потоке.
+    return DatabaseWrapper(settings_dict, alias='stress')
+
+
+def pragma(wrapper, name):
+    with wrapper.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24SQLiteTuning:
+
+    def test_01_pragmas_applied(self, database_file, settings):
+        settings.SQLITE_PRAGMAS = {
+            **settings.SQLITE_PRAGMAS, 'busy_timeout': 1234
+        }
+        wrapper = open_connection(database_file)
+        try:
+            assert pragma(wrapper, 'journal_mode') == 'wal', (
+                'Проверьте, что новое соединение с SQLite переводится в '
+                'режим WAL.'
+            )
+            # 1 — NORMAL.
+            assert pragma(wrapper, 'synchronous') == 1
+            assert pragma(wrapper, 'busy_timeout') == 1234, (
+                'Проверьте, что PRAGMA берутся из settings.SQLITE_PRAGMAS.'
+            )
+        finally:
+            wrapper.close()
+
+    def test_02_concurrent_writes(self, database_file):
+        def write(writer):
+            wrapper = open_connection(database_file)
+            try:
+                for number in range(WRITES_PER_WRITER):
+                    with wrapper.cursor() as cursor:
+                        cursor.execute(
+                            'INSERT INTO review (score) VALUES (%s)',
+                            [(writer + number) % 10 + 1],
+                        )
+            finally:
+                wrapper.close()
+
+        with ThreadPoolExecutor(WRITERS) as pool:
+            # list() пробрасывает исключения из потоков, в том числе
+            # OperationalError: database is locked.
+            list(pool.map(write, range(WRITERS)))
+
+        wrapper = open_connection(database_file)
+        try:
+            with wrapper.cursor() as cursor:
+                cursor.execute('SELECT COUNT(*) FROM review')
+                assert cursor.fetchone()[0] == WRITERS * WRITES_PER_WRITER
+        finally:
+            wrapper.close()
+
+    def test_03_readers_not_blocked_by_writer(self, database_file,
+                                              settings):
+        settings.SQLITE_PRAGMAS = {
+            **settings.SQLITE_PRAGMAS, 'busy_timeout': 100
+        }
+        writer = open_connection(database_file)
+        read_counts = []
+
+        def read():
+            reader = open_connection(database_file)
+            try:
+                with reader.cursor() as cursor:
+                    cursor.execute('SELECT COUNT(*) FROM review')
+                    read_counts.append(cursor.fetchone()[0])
+            finally:
+                reader.close()
+
+        try:
+            with writer.cursor() as cursor:
+                cursor.execute('INSERT INTO review (score) VALUES (5)')
+                # Без WAL EXCLUSIVE не пускает и читателей.
+                cursor.execute('BEGIN EXCLUSIVE')
+                cursor.execute('INSERT INTO review (score) VALUES (7)')
+                thread = threading.Thread(target=read)
+                thread.start()
+                thread.join()
+                cursor.execute('COMMIT')
+        finally:
+            writer.close()
+        assert read_counts == [1], (
+            'Проверьте, что читатель видит последнюю зафиксированную '
+            'версию данных, пока открыта пишущая транзакция.'
+        )
@@ -0,0 +1,139 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connections
+from rest_framework.test import APIClient
+
+THREADS = 8
+POSTS_PER_USER = 3
+
+
+def client_for(user):
+    from api.authentication import RoleAccessToken
+
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(user)}'
+    )
+    return client
+
+
+def create_title():
+    from reviews.models import Category, Title
+
+    category = Category.objects.create(name='Фильм', slug='films')
+    return Title.objects.create(name='Фильм', year=2000, category=category)
+
+
+@pytest.fixture
+def title():
+    return create_title()
+
+
+def closing_connections(function):
+    def wrapper(*args, **kwargs):
+        try:
+            return function(*args, **kwargs)
+        finally:
+            connections.close_all()
+
+    return wrapper
+
+
+def in_thread(function, *args, **kwargs):
+    with ThreadPoolExecutor(1) as pool:
+        return pool.submit(
+            closing_connections(function), *args, **kwargs
+        ).result()
+
+
+@pytest.fixture
+def file_database(tmp_path):
+    """База SQLite в файле для потоков теста.
+
+    Тестовая база в памяти с общим кэшем блокирует таблицы целиком и
+    сразу отвечает «database table is locked», не дожидаясь
+    busy_timeout. Соединение создаётся из connections.databases при
+    первом обращении в потоке, поэтому новые потоки работают с файлом,
+    а основной поток — по-прежнему с тестовой базой.
+    """
+    original = connections.databases['default']
+    connections.databases['default'] = {
+        **original, 'NAME': str(tmp_path / 'race.sqlite3')
+    }
+    try:
+        in_thread(call_command, 'migrate', run_syncdb=True, verbosity=0)
+        yield
+    finally:
+        connections.databases['default'] = original
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25ReviewRace:
+
+    @staticmethod
+    def reviews_url(title):
+        return f'/api/v1/titles/{title.id}/reviews/'
+
+    def test_01_no_exists_query(self, admin, user, title,
+                                django_assert_num_queries):
+        response = client_for(admin).post(
+            self.reviews_url(title), data={'text': 'Нет', 'score': 3}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        client = client_for(user)
+        # Произведение, BEGIN, INSERT отзыва, UPDATE рейтинга, UPDATE
+        # TitleRanking и запись в поисковый индекс — без проверки
+        # существующего отзыва.
+        with django_assert_num_queries(6):
+            response = client.post(
+                self.reviews_url(title), data={'text': 'Да', 'score': 7}
+            )
+        assert response.status_code == HTTPStatus.CREATED
+
+        response = client.post(
+            self.reviews_url(title), data={'text': 'Ещё', 'score': 1}
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что повторный отзыв пользователя на то же '
+            'произведение возвращает ответ со статусом 400.'
+        )
+        title.refresh_from_db()
+        assert (title.rating_count, title.rating) == (2, 5)
+
+    def test_02_concurrent_posts(self, django_user_model, file_database):
+        def create_users():
+            return [
+                django_user_model.objects.create_user(
+                    username=f'racer{idx}', email=f'racer{idx}@yamdb.fake'
+                )
+                for idx in range(THREADS)
+            ]
+
+        users = in_thread(create_users)
+        title = in_thread(create_title)
+        barrier = threading.Barrier(THREADS * POSTS_PER_USER)
+
+        @closing_connections
+        def post(user):
+            client = client_for(user)
+            barrier.wait()
+            return client.post(
+                self.reviews_url(title), data={'text': 'Да', 'score': 5}
+            ).status_code
+
+        with ThreadPoolExecutor(THREADS * POSTS_PER_USER) as pool:
+            statuses = list(pool.map(post, users * POSTS_PER_USER))
+        assert sorted(statuses) == sorted(
+            [HTTPStatus.CREATED] * THREADS
+            + [HTTPStatus.BAD_REQUEST] * THREADS * (POSTS_PER_USER - 1)
+        ), (
+            'Проверьте, что одновременные отзывы одного пользователя на '
+            'одно произведение дают один ответ 201 и 400 на остальные, '
+            'без ошибок 500.'
+        )
+        in_thread(title.refresh_from_db)
+        assert title.rating_count == THREADS
@@ -0,0 +1,205 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from tests.utils import create_single_review, create_titles
+
+REVIEWERS = 12
+
+
+@pytest.fixture
+def reviewers(django_user_model):
+    return [
+        django_user_model.objects.create_user(
+            username=f'reviewer{idx}', email=f'reviewer{idx}@yamdb.fake'
+        )
+        for idx in range(REVIEWERS)
+    ]
+
+
+@pytest.fixture
+def catalogue(admin_client):
+    from reviews.models import Category, Title
+
+    titles, _, _ = create_titles(admin_client)
+    third = Title.objects.create(
+        name='Чужой', year=1979, category=Category.objects.get(slug='films')
+    )
+    return [title['id'] for title in titles] + [third.pk]
+
+
+def add_reviews(title_id, authors, score):
+    from reviews.models import Review
+
+    return [
+        Review.objects.create(
+            title_id=title_id, author=author, text='Текст', score=score
+        )
+        for author in authors
+    ]
+
+
+def rankings():
+    from reviews.models import TitleRanking
+
+    return {
+        ranking.title_id: (ranking.weighted_rating, ranking.trend)
+        for ranking in TitleRanking.objects.all()
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26Rankings:
+
+    TOP_URL = '/api/v1/titles/top/'
+    TRENDING_URL = '/api/v1/titles/trending/'
+
+    @staticmethod
+    def get_ids(client, url):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` доступен без токена.'
+        )
+        return [title['id'] for title in response.json()['results']]
+
+    def test_01_weighted_rating(self, client, catalogue, reviewers):
+        single, popular, weak = catalogue
+        add_reviews(single, reviewers[:1], 10)
+        add_reviews(popular, reviewers, 9)
+        add_reviews(weak, reviewers, 3)
+        call_command('refresh_rankings')
+
+        assert self.get_ids(client, self.TOP_URL) == [popular, single, weak], (
+            'Проверьте, что произведение с одной оценкой 10 не обгоняет '
+            'произведение со многими оценками 9.'
+        )
+        response = client.get(self.TOP_URL + '?limit=1')
+        title = response.json()['results'][0]
+        prior = (10 + 9 * REVIEWERS + 3 * REVIEWERS) / (2 * REVIEWERS + 1)
+        assert title['weighted_rating'] == pytest.approx(
+            (9 * REVIEWERS + 10 * prior) / (REVIEWERS + 10)
+        )
+        assert title['name'] == 'Крепкий орешек'
+        assert title['rating'] == 9
+        assert [genre['slug'] for genre in title['genre']] == ['drama']
+
+        assert self.get_ids(client, self.TOP_URL + '?category=FILMS') == [
+            single, weak
+        ], 'Проверьте фильтр `category` рейтинга произведений.'
+        assert self.get_ids(client, self.TOP_URL + '?genre=comedy') == [
+            single
+        ], 'Проверьте фильтр `genre` рейтинга произведений.'
+
+    def test_02_trending(self, client, catalogue, reviewers):
+        from reviews.models import Review
+
+        old, fresh, _ = catalogue
+        add_reviews(old, reviewers[:3], 10)
+        add_reviews(fresh, reviewers[:1], 5)
+        Review.objects.filter(title_id=old).update(
+            pub_date=timezone.localdate() - timedelta(days=70)
+        )
+        call_command('refresh_rankings')
+
+        response = client.get(self.TRENDING_URL)
+        results = response.json()['results']
+        assert [title['id'] for title in results] == [fresh, old], (
+            'Проверьте, что недавние отзывы весят в trending больше старых.'
+        )
+        assert results[0]['trend'] == pytest.approx(1)
+        assert results[1]['trend'] == pytest.approx(3 * 0.5 ** 10)
+
+    def test_03_incremental_matches_refresh(self, admin_client, user_client,
+                                            moderator_client, catalogue,
+                                            reviewers):
+        first, second, _ = catalogue
+        add_reviews(first, reviewers[:4], 8)
+        create_single_review(user_client, first, 'Отзыв', 2)
+        deleted = create_single_review(
+            moderator_client, first, 'Отзыв', 6
+        ).json()
+        updated = create_single_review(
+            admin_client, second, 'Отзыв', 7
+        ).json()
+        add_reviews(second, reviewers[4:], 4)
+        admin_client.patch(
+            f'/api/v1/titles/{second}/reviews/{updated["id"]}/',
+            data={'score': 1}
+        )
+        admin_client.delete(
+            f'/api/v1/titles/{first}/reviews/{deleted["id"]}/'
+        )
+        incremental = rankings()
+        assert set(incremental) == {first, second}
+
+        from reviews.models import refresh_rankings
+
+        refresh_rankings([first, second])
+        for title_id, (weighted, trend) in rankings().items():
+            assert incremental[title_id] == (
+                pytest.approx(weighted), pytest.approx(trend)
+            ), (
+                'Проверьте, что рейтинг, обновлённый при записи отзывов, '
+                'совпадает с пересчитанным по всем отзывам.'
+            )
+
+    def test_04_page_without_count(self, client, catalogue, reviewers,
+                                   django_assert_num_queries):
+        for title_id in catalogue:
+            add_reviews(title_id, reviewers[:2], 5)
+        with django_assert_num_queries(2):
+            response = client.get(self.TOP_URL + '?limit=2')
+        data = response.json()
+        assert 'count' not in data, (
+            'Проверьте, что рейтинг не считает общее количество произведений.'
+        )
+        assert len(data['results']) == 2
+        assert data['next'].endswith('?limit=2&offset=2')
+        response = client.get(data['next'])
+        assert len(response.json()['results']) == 1
+        assert response.json()['next'] is None
+
+    def test_05_title_category_change(self, admin_client, client, catalogue,
+                                      reviewers):
+        first, _, _ = catalogue
+        add_reviews(first, reviewers[:1], 5)
+        response = admin_client.patch(
+            f'/api/v1/titles/{first}/', data={'category': 'books'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert self.get_ids(client, self.TOP_URL + '?category=books') == [
+            first
+        ], 'Проверьте, что рейтинг следует за сменой категории произведения.'
+
+    def test_06_prior_not_recomputed_on_write(self, catalogue, reviewers):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from reviews.models import TitleRanking, refresh_rankings
+
+        first, second, third = catalogue
+        add_reviews(first, reviewers[:2], 10)
+        add_reviews(second, reviewers[:2], 2)
+        refresh_rankings()
+        prior = TitleRanking.objects.get(title_id=first).prior
+        assert prior == pytest.approx(6)
+
+        with CaptureQueriesContext(connection) as context:
+            add_reviews(first, reviewers[2:3], 10)
+            add_reviews(third, reviewers[:1], 4)
+        sql = '\n'.join(query['sql'] for query in context.captured_queries)
+        assert 'SUM(' not in sql.upper(), (
+            'Проверьте, что запись отзыва не считает среднюю оценку по '
+            f'всему каталогу:\n{sql}'
+        )
+        for title_id, score_sum, score_count in (
+            (first, 30, 3), (third, 4, 1)
+        ):
+            ranking = TitleRanking.objects.get(title_id=title_id)
+            assert ranking.prior == pytest.approx(prior)
+            assert ranking.weighted_rating == pytest.approx(
+                (score_sum + 10 * prior) / (score_count + 10)
+            ), 'Проверьте, что запись отзыва берёт сохранённую среднюю.'
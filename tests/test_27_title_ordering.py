@@ -0,0 +1,96 @@
+import pytest
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+ORDERING_KEYS = ('rating', 'year', 'name', 'rating_count')
+
+
+@pytest.fixture
+def titles():
+    from reviews.models import Category, Title
+
+    category = Category.objects.create(name='Фильм', slug='films')
+    # (название, год, рейтинг, количество оценок)
+    rows = (
+        ('Б', 1990, 7.5, 4),
+        ('Г', 1970, None, 0),
+        ('А', 2010, 9.0, 1),
+        ('В', 1990, 3.0, 12),
+    )
+    result = []
+    for name, year, rating, rating_count in rows:
+        title = Title.objects.create(name=name, year=year, category=category)
+        Title.objects.filter(pk=title.pk).update(
+            rating=rating, rating_count=rating_count
+        )
+        result.append(title.pk)
+    return result
+
+
+def ordered_queryset(ordering):
+    from api.v1.views import TitleViewSet
+
+    view = TitleViewSet(action='list', format_kwarg=None, kwargs={})
+    view.request = Request(
+        APIRequestFactory().get('/api/v1/titles/', {'ordering': ordering})
+    )
+    return view.filter_queryset(view.get_queryset())
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27TitleOrdering:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def get_ids(self, client, ordering):
+        response = client.get(self.TITLES_URL, {'ordering': ordering})
+        assert response.status_code == 200
+        return [title['id'] for title in response.json()['results']]
+
+    def test_01_ordering(self, client, titles):
+        b, g, a, v = titles
+        expected = {
+            'rating': [g, v, b, a],
+            '-rating': [a, b, v, g],
+            'year': [g, b, v, a],
+            '-year': [a, v, b, g],
+            'name': [a, b, v, g],
+            '-name': [g, v, b, a],
+            'rating_count': [g, a, b, v],
+            '-rating_count': [v, b, a, g],
+            'reviews_count': [g, a, b, v],
+            '-reviews_count': [v, b, a, g],
+        }
+        for ordering, ids in expected.items():
+            assert self.get_ids(client, ordering) == ids, (
+                f'Проверьте сортировку произведений `?ordering={ordering}`. '
+                'Произведения без оценок должны считаться наименьшими по '
+                '`rating`, а равные значения — упорядочиваться по id.'
+            )
+        response = client.get(self.TITLES_URL, {'ordering': '-reviews_count'})
+        assert [
+            title['reviews_count'] for title in response.json()['results']
+        ] == [12, 4, 1, 0], (
+            'Проверьте, что количество оценок, по которому можно '
+            'сортировать, есть в ответе в поле `reviews_count`.'
+        )
+        assert self.get_ids(client, '') == [a, b, v, g], (
+            'Проверьте, что по умолчанию произведения отсортированы по '
+            'названию.'
+        )
+        assert self.get_ids(client, 'description') == [a, b, v, g], (
+            'Проверьте, что сортировка по другим полям не применяется.'
+        )
+
+    def test_02_ordering_uses_index(self, titles):
+        from django.db import connection
+
+        if connection.vendor != 'sqlite':
+            pytest.skip('План проверяется для SQLite.')
+        for key in ORDERING_KEYS:
+            for ordering in (key, f'-{key}'):
+                plan = ordered_queryset(ordering)[:10].explain()
+                assert 'TEMP B-TREE' not in plan, (
+                    f'Проверьте, что `?ordering={ordering}` выполняется по '
+                    f'индексу без сортировки всей таблицы:\n{plan}'
+                )
@@ -0,0 +1,112 @@
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.fixture
+def catalogue(admin_client):
+    """Терминатор (horror, comedy; 1984), Крепкий орешек (drama; 1988),
+    Чужой (horror, drama; 1979)."""
+    from reviews.models import Category, Genre, Title
+
+    titles, _, _ = create_titles(admin_client)
+    alien = Title.objects.create(
+        name='Чужой', year=1979, category=Category.objects.get(slug='films')
+    )
+    alien.genre.set(Genre.objects.filter(slug__in=('horror', 'drama')))
+    return [title['id'] for title in titles] + [alien.pk]
+
+
+def title_filter_queryset(params):
+    from api.v1.filters import TitleFilter
+    from reviews.models import Title
+
+    return TitleFilter(params, queryset=Title.objects.all()).qs
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28TitleFilters:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def get_ids(self, client, params):
+        response = client.get(self.TITLES_URL, params)
+        assert response.status_code == 200
+        data = response.json()
+        ids = [title['id'] for title in data['results']]
+        assert data['count'] == len(ids), (
+            'Проверьте, что количество произведений в ответе совпадает с '
+            'числом результатов: фильтр по жанрам не должен их дублировать.'
+        )
+        return sorted(ids)
+
+    def test_01_genres(self, client, catalogue):
+        terminator, die_hard, alien = catalogue
+        assert self.get_ids(client, {'genre': 'HORROR'}) == [
+            terminator, alien
+        ], 'Проверьте, что жанр сравнивается без учёта регистра.'
+        assert self.get_ids(client, {'genre': 'horror,drama'}) == [
+            terminator, die_hard, alien
+        ], (
+            'Проверьте, что `?genre=a,b` возвращает произведения с любым из '
+            'жанров, каждое по одному разу.'
+        )
+        assert self.get_ids(
+            client, {'genre': 'horror, Drama', 'genre_mode': 'all'}
+        ) == [alien], (
+            'Проверьте, что `?genre=a,b&genre_mode=all` возвращает '
+            'произведения со всеми перечисленными жанрами.'
+        )
+        assert self.get_ids(
+            client, {'genre': 'horror,comedy,drama', 'genre_mode': 'all'}
+        ) == []
+        assert self.get_ids(client, {'genre': 'western'}) == []
+        response = client.get(self.TITLES_URL, {'genre_mode': 'none'})
+        assert response.status_code == 400, (
+            'Проверьте, что неизвестный `genre_mode` возвращает ответ со '
+            'статусом 400.'
+        )
+
+    def test_02_years(self, client, catalogue):
+        terminator, die_hard, alien = catalogue
+        assert self.get_ids(client, {'year_min': 1984}) == [
+            terminator, die_hard
+        ], 'Проверьте фильтр `year_min`: граница включается.'
+        assert self.get_ids(client, {'year_max': 1984}) == [
+            terminator, alien
+        ], 'Проверьте фильтр `year_max`: граница включается.'
+        assert self.get_ids(
+            client, {'year_min': 1980, 'year_max': 1985, 'genre': 'horror'}
+        ) == [terminator]
+        assert self.get_ids(client, {'year': 1988}) == [die_hard]
+
+    def test_03_semi_join_without_distinct(self, catalogue):
+        from django.db import connection
+
+        for params in (
+            {'genre': 'horror'},
+            {'genre': 'horror,drama'},
+            {'genre': 'horror,drama', 'genre_mode': 'all'},
+        ):
+            queryset = title_filter_queryset(params)
+            sql = str(queryset.query)
+            assert 'DISTINCT' not in sql and 'JOIN' not in sql, (
+                'Проверьте, что фильтр по жанрам построен на подзапросах, а '
+                f'не на join с DISTINCT:\n{sql}'
+            )
+            if connection.vendor == 'sqlite':
+                plan = queryset[:10].explain()
+                assert 'genre_slug_upper_idx' in plan, (
+                    f'Проверьте, что жанр ищется по индексу:\n{plan}'
+                )
+                assert 'genretitle_genre_title_idx' in plan, (
+                    f'Проверьте, что связи с жанром ищутся по индексу:\n{plan}'
+                )
+
+        if connection.vendor == 'sqlite':
+            plan = title_filter_queryset(
+                {'year_min': 1980, 'year_max': 1985}
+            ).explain()
+            assert 'title_year_idx' in plan, (
+                f'Проверьте, что диапазон лет использует индекс:\n{plan}'
+            )